@@ -0,0 +1,147 @@
+from datetime import date, timedelta
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from database.database import get_read_db
+from database.models import Room
+from auth.tokens import require_admin
+from analytics.rollups import COUNTER_COLUMNS, month_start, next_month, rollups
+
+router = APIRouter()
+
+MAX_UTILIZATION_DAYS = 3660  # Ten years; month rows keep long ranges cheap
+MAX_DAILY_DAYS = 366
+
+
+def rollup_condition(from_date: date, to_date: date, interval: str):
+    """
+    Rows covering [from_date, to_date] exactly: month rows for every whole
+    month inside the range and day rows for the partial months at its edges,
+    so a multi-year range reads a few dozen rows per room.
+    """
+    def day_rows(first, last):
+        return and_(rollups.c.period == "day", rollups.c.period_start.between(first, last))
+
+    if interval == "day":
+        return day_rows(from_date, to_date)
+
+    first_month = from_date if from_date.day == 1 else next_month(from_date)
+    end_month = month_start(to_date + timedelta(days=1))  # Months before this one end inside the range
+    if first_month >= end_month:
+        return day_rows(from_date, to_date)
+
+    conditions = [and_(
+        rollups.c.period == "month",
+        rollups.c.period_start >= first_month,
+        rollups.c.period_start < end_month,
+    )]
+    if from_date < first_month:
+        conditions.append(day_rows(from_date, first_month - timedelta(days=1)))
+    if end_month <= to_date:
+        conditions.append(day_rows(end_month, to_date))
+    return or_(*conditions)
+
+
+def period_key(period_start: date, interval: str, from_date: date):
+    if interval == "day":
+        return period_start
+    if interval == "month":
+        return max(month_start(period_start), from_date)
+    return from_date
+
+
+def period_days(start: date, interval: str, to_date: date) -> int:
+    if interval == "day":
+        return 1
+    end = min(next_month(start) - timedelta(days=1), to_date) if interval == "month" else to_date
+    return (end - start).days + 1
+
+
+def summarize(counters, days: int, from_hour: int, to_hour: int):
+    hourly = counters[2:]
+    open_minutes = days * (to_hour - from_hour) * 60
+    return {
+        "booked_minutes": counters[0],
+        "booking_count": counters[1],
+        "utilization": round(sum(hourly[from_hour:to_hour]) / open_minutes, 4),
+        "peak_hour": max(range(24), key=hourly.__getitem__) if counters[0] else None,
+        "hourly_minutes": hourly,
+    }
+
+
+@router.get("/utilization")
+async def get_utilization(
+        user_role: str = Depends(require_admin),
+        db: AsyncSession = Depends(get_read_db),
+        from_date: date = Query(..., alias="from", description="First day"),
+        to_date: Optional[date] = Query(None, alias="to", description="Last day (default: from)"),
+        room_id: Optional[int] = None,
+        interval: Literal["total", "day", "month"] = "total",
+        from_hour: int = Query(0, ge=0, le=23, description="Opening hour for the utilization ratio"),
+        to_hour: int = Query(24, ge=1, le=24, description="Closing hour for the utilization ratio"),
+):
+    """
+    Booked minutes, booking counts, the booked minutes per hour of the day
+    and the share of opening hours booked, per room over a date range, as a
+    total or per day or month. Answered from the utilization rollups, never
+    from the bookings themselves.
+    """
+    to_date = to_date or from_date
+    if to_date < from_date:
+        raise HTTPException(status_code=400, detail="'to' must not be before 'from'.")
+    if to_hour <= from_hour:
+        raise HTTPException(status_code=400, detail="to_hour must be after from_hour.")
+    days = (to_date - from_date).days + 1
+    limit = MAX_DAILY_DAYS if interval == "day" else MAX_UTILIZATION_DAYS
+    if days > limit:
+        raise HTTPException(status_code=400, detail=f"Date range is limited to {limit} days for this interval.")
+
+    rooms_query = select(Room.id, Room.name).order_by(Room.id)
+    counters_query = select(
+        rollups.c.room_id, rollups.c.period_start, *(rollups.c[name] for name in COUNTER_COLUMNS)
+    ).where(rollup_condition(from_date, to_date, interval))
+    if room_id is not None:
+        rooms_query = rooms_query.where(Room.id == room_id)
+        counters_query = counters_query.where(rollups.c.room_id == room_id)
+
+    rooms = (await db.execute(rooms_query)).all()
+    if room_id is not None and not rooms:
+        raise HTTPException(status_code=404, detail="Room not found.")
+
+    totals = {}  # room_id -> counters over the whole range
+    periods = {}  # room_id -> period start -> counters
+    for rollup_room_id, period_start, *counters in await db.execute(counters_query):
+        targets = [totals.setdefault(rollup_room_id, [0] * len(COUNTER_COLUMNS))]
+        if interval != "total":
+            room_periods = periods.setdefault(rollup_room_id, {})
+            start = period_key(period_start, interval, from_date)
+            targets.append(room_periods.setdefault(start, [0] * len(COUNTER_COLUMNS)))
+        for target in targets:
+            for index, value in enumerate(counters):
+                target[index] += value
+
+    report = []
+    for rollup_room_id, name in rooms:
+        entry = {
+            "room_id": rollup_room_id,
+            "name": name,
+            **summarize(totals.get(rollup_room_id, [0] * len(COUNTER_COLUMNS)), days, from_hour, to_hour),
+        }
+        if interval != "total":
+            entry["periods"] = [
+                {"start": start.isoformat(), **summarize(counters, period_days(start, interval, to_date),
+                                                         from_hour, to_hour)}
+                for start, counters in sorted(periods.get(rollup_room_id, {}).items())
+            ]
+        report.append(entry)
+
+    return ORJSONResponse({
+        "from": from_date.isoformat(),
+        "to": to_date.isoformat(),
+        "interval": interval,
+        "hours": [from_hour, to_hour],
+        "rooms": report,
+    })
@@ -0,0 +1,48 @@
+"""
+Rebuild the room utilization rollups from the bookings, archived ones
+included:
+
+    python -m analytics.backfill                                # every month with bookings
+    python -m analytics.backfill --from 2024-01-01 --to 2024-12-31
+
+Run it once after migration 6, and again if bookings were ever changed
+outside the API. Every calendar month the range touches is recomputed
+whole, each in its own transaction, so it can be interrupted and rerun.
+"""
+import argparse
+import asyncio
+from datetime import date
+from sqlalchemy import func, union_all
+from sqlalchemy.future import select
+from database import SessionLocal, get_engine
+from database.models import Booking, BookingArchive
+from analytics.rollups import month_start, next_month, rebuild_month
+
+
+async def run(from_date: date = None, to_date: date = None):
+    engine = get_engine()
+    async with SessionLocal() as session:
+        if from_date is None or to_date is None:
+            dates = union_all(*(
+                select(func.min(model.booking_date).label("first"), func.max(model.booking_date).label("last"))
+                for model in (Booking, BookingArchive)
+            )).subquery()
+            first, last = (await session.execute(select(func.min(dates.c.first), func.max(dates.c.last)))).one()
+            from_date, to_date = from_date or first, to_date or last
+        if from_date is None:
+            print("no bookings; nothing to rebuild")
+        else:
+            month = month_start(from_date)
+            while month <= to_date:
+                count = await rebuild_month(session, month)
+                print(f"{month:%Y-%m}: {count} bookings")
+                month = next_month(month)
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild the room utilization rollups.")
+    parser.add_argument("--from", dest="from_date", type=date.fromisoformat, help="first day (default: oldest booking)")
+    parser.add_argument("--to", dest="to_date", type=date.fromisoformat, help="last day (default: newest booking)")
+    args = parser.parse_args()
+    asyncio.run(run(args.from_date, args.to_date))
@@ -0,0 +1,106 @@
+from datetime import date, timedelta
+from sqlalchemy import delete, insert, text, union_all, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from database.database import upsert_insert
+from database.models import Booking as BookingModel, BookingArchive, RoomUtilization
+from database.partitions import month_start, next_month
+from booking.availability import booking_interval
+
+HOUR_COLUMNS = tuple(f"hour_{hour:02d}" for hour in range(24))
+COUNTER_COLUMNS = ("booked_minutes", "booking_count") + HOUR_COLUMNS
+
+rollups = RoomUtilization.__table__
+
+
+def hour_minutes(start_time, end_time):
+    """Booked minutes in each hour of the day for one booking."""
+    start, end = booking_interval(start_time, end_time)
+    minutes = [0] * 24
+    for hour in range(start // 60, (end + 59) // 60):
+        minutes[hour] = min(end, (hour + 1) * 60) - max(start, hour * 60)
+    return minutes
+
+
+def accumulate(bookings):
+    """
+    Sum (room_id, booking_date, start_time, end_time) rows into counter rows
+    keyed by (room_id, period, period_start), for both days and months.
+    """
+    totals = {}
+    for room_id, booking_date, start_time, end_time in bookings:
+        minutes = hour_minutes(start_time, end_time)
+        for key in ((room_id, "day", booking_date), (room_id, "month", month_start(booking_date))):
+            counters = totals.setdefault(key, [0] * len(COUNTER_COLUMNS))
+            counters[0] += sum(minutes)
+            counters[1] += 1
+            for hour, value in enumerate(minutes):
+                counters[2 + hour] += value
+    return [
+        {"room_id": room_id, "period": period, "period_start": period_start, **dict(zip(COUNTER_COLUMNS, counters))}
+        for (room_id, period, period_start), counters in sorted(totals.items())
+    ]
+
+
+async def record_bookings(db: AsyncSession, bookings):
+    """
+    Add newly inserted bookings to the rollups in the caller's transaction,
+    with one atomic increment-or-insert per touched (room, day/month) row.
+    """
+    rows = accumulate(bookings)
+    if not rows:
+        return
+
+    insert_construct = upsert_insert(db.bind.dialect.name)
+    if insert_construct is not None:
+        statement = insert_construct(rollups).values(rows)
+        await db.execute(statement.on_conflict_do_update(
+            index_elements=[rollups.c.room_id, rollups.c.period, rollups.c.period_start],
+            set_={name: rollups.c[name] + statement.excluded[name] for name in COUNTER_COLUMNS},
+        ))
+        return
+
+    # Without an upsert: update the rows that exist, insert the others.
+    for row in rows:
+        result = await db.execute(
+            update(rollups)
+            .where(
+                rollups.c.room_id == row["room_id"],
+                rollups.c.period == row["period"],
+                rollups.c.period_start == row["period_start"],
+            )
+            .values({name: rollups.c[name] + row[name] for name in COUNTER_COLUMNS})
+        )
+        if result.rowcount == 0:
+            await db.execute(insert(rollups).values(row))
+
+
+async def rebuild_month(db: AsyncSession, month: date):
+    """
+    Recompute the day and month rows of one calendar month from the bookings,
+    archived ones included, and commit. On PostgreSQL booking writes and the
+    archiver wait for the few statements this takes, so no booking can slip
+    between the read and the rewrite.
+    """
+    first_day, last_day = month, next_month(month) - timedelta(days=1)
+    if db.bind.dialect.name == "postgresql":
+        await db.execute(text(
+            f"LOCK TABLE {BookingModel.__tablename__}, {BookingArchive.__tablename__} IN SHARE MODE"
+        ))
+
+    result = await db.execute(union_all(*(
+        select(model.room_id, model.booking_date, model.start_time, model.end_time)
+        .where(model.booking_date.between(first_day, last_day))
+        for model in (BookingModel, BookingArchive)
+    )))
+    bookings = result.all()
+
+    await db.execute(delete(rollups).where(
+        ((rollups.c.period == "day") & rollups.c.period_start.between(first_day, last_day))
+        | ((rollups.c.period == "month") & (rollups.c.period_start == first_day))
+    ))
+    rows = accumulate(bookings)
+    if rows:
+        await db.execute(insert(rollups), rows)
+    await db.commit()
+    return len(bookings)
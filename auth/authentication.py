@@ -5,15 +5,11 @@ from sqlalchemy.future import select
 from database.database import get_db
 #from models import User
 from database.models import User
-from passlib.context import CryptContext
-import jwt
-import datetime
+from auth.passwords import verify_password
+from auth.tokens import create_access_token
 from pydantic import BaseModel
 
 router = APIRouter()
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-SECRET_KEY = "your_secret_key"
 
 
 class LoginRequest(BaseModel):
@@ -27,15 +23,24 @@ async def login(data: LoginRequest, db: AsyncSession = Depends(get_db)):
     result = await db.execute(stmt)
     user = result.scalar_one_or_none()
 
-    if not user or not pwd_context.verify(data.password, user.password_hash):
+    if not user:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+
+    valid, new_hash = await verify_password(data.password, user.password_hash)
+    if not valid:
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
+    # The bcrypt cost changed since this hash was made; store the upgraded one.
+    if new_hash:
+        user.password_hash = new_hash
+        await db.commit()
+
     token_data = {
         "sub": user.username,
         "role": user.role,
-        "exp": datetime.datetime.utcnow() + datetime.timedelta(hours=1)
+        "user_id": user.id,
     }
 
-    access_token = jwt.encode(token_data, SECRET_KEY, algorithm="HS256")
+    access_token = create_access_token(token_data)
 
     return {"access_token": access_token, "role": user.role, "user_id": user.id}
@@ -1,11 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException
+import json
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
-from sqlalchemy.ext.asyncio import AsyncSession
-from database.database import get_db
-from database.models import User
-import jwt
-
-SECRET_KEY = "your_secret_key"
+from database.versions import etag_matches, make_etag
+from auth.tokens import get_user_role
 
 router = APIRouter()
 
@@ -14,22 +12,29 @@ class DashboardItem(BaseModel):
     route: str
     icon: str
 
+DASHBOARD_ITEMS = {
+    "admin": [
+        {"name": "Inventory", "route": "/inventory", "icon": "box"},
+        {"name": "Register User", "route": "/register", "icon": "user-plus"},
+    ],
+    "user": [
+        {"name": "Book Room", "route": "/book-room", "icon": "calendar"},
+        {"name": "Inventory", "route": "/inventory", "icon": "box"},
+    ],
+}
+
+# The menu only changes with a deploy, so its content is its version. no-cache
+# rather than max-age: the URL is the same for every role, and a browser
+# shared by two accounts must revalidate instead of reusing the other menu.
+DASHBOARD_ETAGS = {role: make_etag("dashboard", json.dumps(items)) for role, items in DASHBOARD_ITEMS.items()}
+DASHBOARD_HEADERS = {"Cache-Control": "private, no-cache", "Vary": "Authorization"}
+
 @router.get("/", response_model=list[DashboardItem])
-async def get_dashboard_items(token: str, db: AsyncSession = Depends(get_db)):
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
-        role = payload.get("role")
-        if role == "admin":
-            return [
-                {"name": "Inventory", "route": "/inventory", "icon": "box"},
-                {"name": "Register User", "route": "/register", "icon": "user-plus"},
-            ]
-        elif role == "user":
-            return [{"name": "Book Room", "route": "/book-room", "icon": "calendar"},
-                    {"name": "Inventory", "route": "/inventory", "icon": "box"},]
-        else:
-            raise HTTPException(status_code=403, detail="Role not authorized")
-    except jwt.ExpiredSignatureError:
-        raise HTTPException(status_code=401, detail="Token expired")
-    except jwt.PyJWTError:
-        raise HTTPException(status_code=401, detail="Invalid token")
\ No newline at end of file
+async def get_dashboard_items(request: Request, role: str = Depends(get_user_role)):
+    if role not in DASHBOARD_ITEMS:
+        raise HTTPException(status_code=403, detail="Role not authorized")
+
+    etag = DASHBOARD_ETAGS[role]
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag, **DASHBOARD_HEADERS})
+    return ORJSONResponse(DASHBOARD_ITEMS[role], headers={"ETag": etag, **DASHBOARD_HEADERS})
@@ -0,0 +1,73 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from fastapi import HTTPException
+
+# bcrypt work factor. Changing it makes existing hashes "need update", and they
+# are rehashed with the new cost the next time their owner logs in.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+# Size of the hashing pool and how many calls may wait for it before new ones
+# are rejected with 503 instead of queueing without bound.
+PASSWORD_WORKERS = int(os.getenv("PASSWORD_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_QUEUE_SIZE = int(os.getenv("PASSWORD_QUEUE_SIZE", "32"))
+PASSWORD_RETRY_AFTER = os.getenv("PASSWORD_RETRY_AFTER", "1")
+
+
+@lru_cache(maxsize=None)
+def pwd_context():
+    """
+    The hashing context, built on first use: passlib and bcrypt are only
+    imported once a login or registration needs them, not at app startup.
+    """
+    from passlib.context import CryptContext
+
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=BCRYPT_ROUNDS,
+        bcrypt__min_rounds=BCRYPT_ROUNDS,
+        bcrypt__max_rounds=BCRYPT_ROUNDS,
+    )
+
+# bcrypt releases the GIL while hashing, so a thread pool keeps the event
+# loop free without the overhead of worker processes.
+_executor = ThreadPoolExecutor(max_workers=PASSWORD_WORKERS, thread_name_prefix="password")
+_pending = 0
+
+
+async def _run(func, *args):
+    """Run a hashing call on the pool, shedding load once the queue is full."""
+    global _pending
+    if _pending >= PASSWORD_WORKERS + PASSWORD_QUEUE_SIZE:
+        raise HTTPException(
+            status_code=503,
+            detail="Server is busy, please retry shortly.",
+            headers={"Retry-After": PASSWORD_RETRY_AFTER},
+        )
+
+    _pending += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_executor, func, *args)
+    finally:
+        _pending -= 1
+
+
+async def hash_password(password: str) -> str:
+    """Hash a password with the configured bcrypt cost."""
+    return await _run(pwd_context().hash, password)
+
+
+async def verify_password(password: str, password_hash: str):
+    """
+    Check a password against its stored hash.
+    Returns (valid, new_hash); new_hash is set when the stored hash used a
+    different cost and should be replaced.
+    """
+    return await _run(pwd_context().verify_and_update, password, password_hash)
+
+
+def pending_password_jobs() -> int:
+    """Number of hashing calls currently running or queued."""
+    return _pending
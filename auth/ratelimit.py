@@ -0,0 +1,243 @@
+import asyncio
+import math
+import os
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from fastapi import HTTPException, Request
+
+# RATE_LIMIT_URL=redis://host:6379/0 shares the buckets between workers and
+# instances (needs the optional `redis` package); otherwise each worker keeps
+# its own, which multiplies the effective limits by the worker count.
+RATE_LIMIT_URL = os.getenv("RATE_LIMIT_URL")
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+# Proxies in front of the app that each append the address they got the
+# request from to X-Forwarded-For (1 on Render). The client is the entry that
+# many places from the right; anything further left was sent by the client
+# and can be anything, so it is never used.
+TRUSTED_PROXY_HOPS = int(os.getenv("TRUSTED_PROXY_HOPS", "0"))
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600}
+
+
+def parse_limit(spec: str):
+    """
+    "30/minute" -> (refill rate per second, burst capacity) for a bucket that
+    allows 30 requests per minute, all of them at once if it is full.
+    "off" or an empty string disables the limit.
+    """
+    if not spec or spec.strip().lower() == "off":
+        return None
+    count, _, period = spec.strip().partition("/")
+    count = int(count)
+    return count / PERIODS[period or "second"], count
+
+
+def limit_from_env(name: str, default: str):
+    """Limit spec from RATE_LIMIT_<NAME>, e.g. RATE_LIMIT_LOGIN_USER=10/minute."""
+    return parse_limit(os.getenv(f"RATE_LIMIT_{name.upper()}", default))
+
+
+class InMemoryBuckets:
+    """Token buckets local to one worker, bounded to the most recently used keys."""
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self.buckets = OrderedDict()  # key -> (tokens, updated_at)
+
+    async def take(self, key: str, rate: float, capacity: int):
+        """Take one token; returns 0 when allowed, else seconds until one is available."""
+        now = time.monotonic()
+        tokens, updated_at = self.buckets.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated_at) * rate)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / rate
+        self.buckets[key] = (tokens, now)
+        self.buckets.move_to_end(key)
+        while len(self.buckets) > self.max_keys:
+            self.buckets.popitem(last=False)
+        return wait
+
+
+# Refill and take in one atomic step on the server, using the server clock so
+# every worker sees the same time.
+TAKE_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return tostring(wait)
+"""
+
+
+class RedisBuckets:
+    """Token buckets shared through a Redis-compatible server."""
+
+    def __init__(self, url: str):
+        import redis.asyncio as redis  # Optional dependency, only needed when configured
+
+        self.client = redis.from_url(url)
+        self.script = self.client.register_script(TAKE_SCRIPT)
+
+    async def take(self, key: str, rate: float, capacity: int):
+        return float(await self.script(keys=[f"ratelimit:{key}"], args=[rate, capacity]))
+
+
+def make_buckets():
+    if RATE_LIMIT_URL:
+        return RedisBuckets(RATE_LIMIT_URL)
+    return InMemoryBuckets(RATE_LIMIT_MAX_KEYS)
+
+
+buckets = make_buckets()
+rejections = {}  # (scope, reason) -> requests refused
+
+
+def _reject(scope: str, reason: str, status_code: int, retry_after: float, detail: str):
+    rejections[(scope, reason)] = rejections.get((scope, reason), 0) + 1
+    raise HTTPException(
+        status_code=status_code,
+        detail=detail,
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
+
+def client_ip(request: Request) -> str:
+    if TRUSTED_PROXY_HOPS:
+        forwarded = [
+            host.strip()
+            for header in request.headers.getlist("x-forwarded-for")
+            for host in header.split(",")
+            if host.strip()
+        ]
+        if len(forwarded) >= TRUSTED_PROXY_HOPS:
+            return forwarded[-TRUSTED_PROXY_HOPS]
+    # The peer address; uvicorn only replaces it for FORWARDED_ALLOW_IPS peers.
+    return request.client.host if request.client else "unknown"
+
+
+async def username_from_body(request: Request):
+    # FastAPI has already read and cached the JSON body before dependencies run.
+    try:
+        body = await request.json()
+    except ValueError:
+        return None
+    username = body.get("username") if isinstance(body, dict) else None
+    return username.strip().lower() if isinstance(username, str) else None
+
+
+class RateLimit:
+    """
+    Dependency enforcing token buckets per client IP and, optionally, per
+    username taken from the JSON body. Exceeding either answers 429 with a
+    Retry-After header. Limits come from RATE_LIMIT_<SCOPE>_IP and
+    RATE_LIMIT_<SCOPE>_USER, falling back to the given defaults.
+    """
+
+    def __init__(self, scope: str, per_ip: str, per_user: str = None):
+        self.scope = scope
+        self.per_ip = limit_from_env(f"{scope}_ip", per_ip)
+        self.per_user = limit_from_env(f"{scope}_user", per_user) if per_user else None
+
+    async def __call__(self, request: Request):
+        if self.per_ip:
+            wait = await buckets.take(f"{self.scope}:ip:{client_ip(request)}", *self.per_ip)
+            if wait:
+                _reject(self.scope, "ip", 429, wait, "Too many requests, please retry later.")
+        if self.per_user:
+            username = await username_from_body(request)
+            if username:
+                wait = await buckets.take(f"{self.scope}:user:{username}", *self.per_user)
+                if wait:
+                    _reject(self.scope, "user", 429, wait, "Too many attempts for this account, please retry later.")
+
+
+class ConcurrencyLimit:
+    """
+    Dependency capping how many requests run a CPU-heavy route at once across
+    every route that shares it. Up to `max_waiting` more wait at most
+    `timeout` seconds for a slot; anything beyond that is refused with 503
+    straight away instead of piling up behind the busy ones.
+    """
+
+    def __init__(self, scope: str, limit: int, max_waiting: int, timeout: float):
+        self.scope = scope
+        self.limit = limit
+        self.max_waiting = max_waiting
+        self.timeout = timeout
+        self.active = 0
+        self.waiting = 0
+        self._slots = asyncio.Semaphore(limit)
+
+    async def __call__(self):
+        async with self.slot():
+            yield
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one slot for the body; for routes that are only sometimes heavy."""
+        if not self._slots.locked():
+            await self._slots.acquire()  # A free slot is taken without yielding
+        elif self.waiting >= self.max_waiting:
+            _reject(self.scope, "busy", 503, self.timeout, "Server is busy, please retry shortly.")
+        else:
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._slots.acquire(), self.timeout)
+            except asyncio.TimeoutError:
+                _reject(self.scope, "timeout", 503, self.timeout, "Server is busy, please retry shortly.")
+            finally:
+                self.waiting -= 1
+        self.active += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self._slots.release()
+
+    def stats(self):
+        labels = f'{{scope="{self.scope}"}}'
+        return {
+            f"concurrency_limit_active{labels}": self.active,
+            f"concurrency_limit_waiting{labels}": self.waiting,
+        }
+
+
+def rejection_stats():
+    return {
+        f'rate_limit_rejections_total{{scope="{scope}",reason="{reason}"}}': count
+        for (scope, reason), count in sorted(rejections.items())
+    }
+
+
+# Shared cap for bcrypt (auth and register routers), bulk inventory imports and
+# multi-day room and equipment availability (CPU_CONCURRENCY, CPU_QUEUE_SIZE,
+# CPU_QUEUE_TIMEOUT). The default leaves room on a worker's
+# event loop for cheap requests such as /api/book-room.
+cpu_heavy = ConcurrencyLimit(
+    "cpu",
+    limit=int(os.getenv("CPU_CONCURRENCY", str(max(2, os.cpu_count() or 1)))),
+    max_waiting=int(os.getenv("CPU_QUEUE_SIZE", "16")),
+    timeout=float(os.getenv("CPU_QUEUE_TIMEOUT", "2")),
+)
+
+# Per-router limits, attached where the routers are included or declared.
+# Per-IP defaults are generous because a whole campus may share one address.
+login_limit = RateLimit("login", per_ip="300/minute", per_user="10/minute")
+register_limit = RateLimit("register", per_ip="30/minute")
+booking_limit = RateLimit("booking", per_ip="600/minute")
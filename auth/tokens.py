@@ -0,0 +1,131 @@
+import datetime
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from typing import Optional
+import jwt
+from fastapi import Depends, HTTPException, Request
+
+ALGORITHM = "HS256"
+ACCESS_TOKEN_EXPIRE = datetime.timedelta(hours=1)
+TOKEN_CACHE_SIZE = int(os.getenv("JWT_CACHE_SIZE", "2048"))
+
+
+def _load_keys():
+    """
+    Signing keys by key id, read once at import.
+
+    JWT_SECRET_KEYS holds "kid:secret" pairs separated by commas. New tokens are
+    signed with JWT_ACTIVE_KID (default: the first pair); the others are still
+    accepted, which allows rotating keys without logging everybody out. Without
+    JWT_SECRET_KEYS the single SECRET_KEY is used under the id "default".
+    """
+    keys = {}
+    for pair in os.getenv("JWT_SECRET_KEYS", "").split(","):
+        kid, sep, secret = pair.strip().partition(":")
+        if sep and kid and secret:
+            keys[kid] = secret
+
+    if not keys:
+        keys["default"] = os.getenv("SECRET_KEY", "your_secret_key")
+
+    active = os.getenv("JWT_ACTIVE_KID") or next(iter(keys))
+    if active not in keys:
+        raise ValueError(f"JWT_ACTIVE_KID '{active}' is not one of the configured keys")
+    return keys, active
+
+
+SIGNING_KEYS, ACTIVE_KID = _load_keys()
+
+# Verified claims keyed by the token's SHA-256 digest, in LRU order.
+_claims_cache = OrderedDict()
+
+
+def create_access_token(claims: dict, expires: datetime.timedelta = ACCESS_TOKEN_EXPIRE) -> str:
+    """Sign claims with the active key, adding an expiry."""
+    payload = {**claims, "exp": datetime.datetime.now(datetime.timezone.utc) + expires}
+    return jwt.encode(payload, SIGNING_KEYS[ACTIVE_KID], algorithm=ALGORITHM, headers={"kid": ACTIVE_KID})
+
+
+def _verify(token: str) -> dict:
+    kid = jwt.get_unverified_header(token).get("kid")
+    if kid is not None:
+        if kid not in SIGNING_KEYS:
+            raise jwt.InvalidTokenError("Unknown key id")
+        return jwt.decode(token, SIGNING_KEYS[kid], algorithms=[ALGORITHM])
+
+    # Tokens issued before key ids existed: try every configured key.
+    for secret in SIGNING_KEYS.values():
+        try:
+            return jwt.decode(token, secret, algorithms=[ALGORITHM])
+        except jwt.InvalidSignatureError:
+            continue
+    raise jwt.InvalidSignatureError("Signature verification failed")
+
+
+def decode_token(token: str) -> dict:
+    """
+    Return the verified claims of a token, raising 401 if it is invalid or expired.
+    Repeated calls with the same token are answered from the cache until the
+    token's own expiry.
+    """
+    digest = hashlib.sha256(token.encode("utf-8")).digest()
+    cached = _claims_cache.get(digest)
+    if cached is not None:
+        claims, expires_at = cached
+        if expires_at > time.time():
+            _claims_cache.move_to_end(digest)
+            return claims
+        del _claims_cache[digest]
+
+    try:
+        claims = _verify(token)
+    except jwt.ExpiredSignatureError:
+        raise HTTPException(status_code=401, detail="Token expired")
+    except jwt.PyJWTError:
+        raise HTTPException(status_code=401, detail="Invalid token")
+
+    expires_at = claims.get("exp")
+    if expires_at is not None:
+        _claims_cache[digest] = (claims, expires_at)
+        if len(_claims_cache) > TOKEN_CACHE_SIZE:
+            _claims_cache.popitem(last=False)
+    return claims
+
+
+async def get_token(request: Request, token: Optional[str] = None) -> str:
+    """The bearer token from the Authorization header, or the `token` query parameter."""
+    scheme, _, credentials = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and credentials:
+        return credentials
+    if token:
+        return token
+    raise HTTPException(status_code=401, detail="Authorization token missing")
+
+
+async def get_current_claims(token: str = Depends(get_token)) -> dict:
+    """Verified claims of the caller's token."""
+    return decode_token(token)
+
+
+async def get_user_role(claims: dict = Depends(get_current_claims)):
+    """Extract user role from the JWT token."""
+    return claims.get("role")
+
+
+async def get_current_user_id(claims: dict = Depends(get_current_claims)) -> int:
+    """The caller's user id from the token."""
+    user_id = claims.get("user_id")
+    if user_id is None:
+        raise HTTPException(status_code=401, detail="Invalid token: user ID not found")
+    return int(user_id)
+
+
+async def require_admin(user_role: str = Depends(get_user_role)):
+    """Reject callers that are not admins."""
+    if user_role is None:
+        raise HTTPException(status_code=403, detail="User role missing in the token.")
+    if user_role != "admin":
+        raise HTTPException(status_code=403, detail="Unauthorized access")
+    return user_role
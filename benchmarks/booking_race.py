@@ -0,0 +1,76 @@
+"""
+Check that concurrent bookings of one slot cannot double-book it.
+
+    python -m benchmarks.booking_race --requests 20
+
+Fires identical POST /api/book-room requests for one room and slot at the
+in-process app all at once; exactly one must get 200 and the rest 400. Then
+books the slot right after it (10:00-11:00 after 09:00-10:00), which touches
+the first one without overlapping and must succeed. Each run uses a day with
+no bookings yet. Prints a JSON report and exits with status 1 on any other
+outcome.
+"""
+import argparse
+import asyncio
+import json
+import sys
+from collections import Counter
+from datetime import date, timedelta
+
+import benchmarks.common  # noqa: F401  (sets the benchmark DATABASE_URL)
+
+import httpx
+from sqlalchemy import func
+from sqlalchemy.future import select
+from database import SessionLocal, get_engine
+from database.models import Booking, Room, User
+from main import app, init_db
+
+
+async def free_day_and_ids():
+    """A day after every existing booking, plus a room id and a user id."""
+    async with SessionLocal() as db:
+        last = (await db.execute(select(func.max(Booking.booking_date)))).scalar()
+        room_id = (await db.execute(select(Room.id).order_by(Room.id).limit(1))).scalar()
+        user_id = (await db.execute(select(User.id).where(User.username == "user"))).scalar()
+    day = max(last or date.today(), date.today()) + timedelta(days=1)
+    return day, room_id, user_id
+
+
+async def main(args):
+    await init_db()
+    day, room_id, user_id = await free_day_and_ids()
+    booking = {
+        "user_id": user_id,
+        "room_id": room_id,
+        "booking_date": day.isoformat(),
+        "purpose": "booking race",
+    }
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://race") as client:
+        responses = await asyncio.gather(*(
+            client.post("/api/book-room", json={**booking, "start_time": "09:00", "end_time": "10:00"})
+            for _ in range(args.requests)
+        ))
+        back_to_back = await client.post(
+            "/api/book-room", json={**booking, "start_time": "10:00", "end_time": "11:00"}
+        )
+
+    await get_engine().dispose()
+    statuses = Counter(response.status_code for response in responses)
+    report = {
+        "requests": args.requests,
+        "booking_date": day.isoformat(),
+        "room_id": room_id,
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+        "back_to_back_status": back_to_back.status_code,
+    }
+    print(json.dumps(report, indent=2))
+    return statuses == Counter({200: 1, 400: args.requests - 1}) and back_to_back.status_code == 200
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20)
+    sys.exit(0 if asyncio.run(main(parser.parse_args())) else 1)
@@ -0,0 +1,127 @@
+"""
+Check that a cold start of the app stays within its budget.
+
+    python -m benchmarks.cold_start --import-budget 2.0 --first-response-budget 4.0
+
+Each run starts fresh interpreters, as a scale-from-zero instance does:
+
+- `python -X importtime -c "import main"` gives the import time of the app
+  and its slowest modules, and shows whether any module in DEFERRED was
+  loaded; those are only needed by the first login or the first query;
+- `uvicorn main:app` is started and GET / polled until the first 200, timed
+  from the moment the process is spawned.
+
+Migrations are applied first, as a deploy would, so startup only checks the
+schema version. Prints a JSON report and exits with status 1 when the slowest
+run exceeds a budget or a deferred module was imported.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import benchmarks.common  # noqa: F401  (sets the benchmark DATABASE_URL)
+
+import httpx
+
+# Modules that must not be imported with the app: password hashing and the
+# database drivers are loaded on first use.
+DEFERRED = ("passlib", "bcrypt", "asyncpg", "aiosqlite", "psycopg2", "redis")
+
+
+def child_env():
+    env = dict(os.environ)
+    env["AUTO_MIGRATE"] = "0"
+    return env
+
+
+def measure_imports():
+    """(seconds to import main, imported module names, slowest modules by own time)."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        env=child_env(), capture_output=True, text=True, check=True,
+    )
+    rows = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        own, cumulative, name = line.removeprefix("import time:").split("|")
+        if own.strip().isdigit():
+            rows.append((int(own), int(cumulative), name.strip()))
+    total = next(cumulative for _, cumulative, name in rows if name == "main")
+    slowest = sorted(rows, reverse=True)[:10]
+    return total / 1e6, {name for _, _, name in rows}, [(name, own / 1e3) for own, _, name in slowest]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure_first_response(timeout: float = 30.0) -> float:
+    """Seconds from spawning uvicorn to the first 200 on GET /."""
+    port = free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        env=child_env(),
+    )
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}") as client:
+            while time.perf_counter() - started < timeout:
+                if server.poll() is not None:
+                    raise RuntimeError(f"uvicorn exited with status {server.returncode}")
+                try:
+                    if client.get("/").status_code == 200:
+                        return time.perf_counter() - started
+                except httpx.TransportError:
+                    pass
+                time.sleep(0.01)
+        raise RuntimeError(f"no 200 from / within {timeout}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main(args):
+    from database.main import run
+
+    asyncio.run(run("upgrade"))
+
+    import_times, first_responses, deferred_loaded, slowest = [], [], set(), []
+    for _ in range(args.runs):
+        seconds, modules, slowest = measure_imports()
+        import_times.append(seconds)
+        deferred_loaded |= {
+            name for name in modules if any(name == module or name.startswith(module + ".") for module in DEFERRED)
+        }
+        first_responses.append(measure_first_response())
+
+    report = {
+        "runs": args.runs,
+        "import_budget_seconds": args.import_budget,
+        "import_seconds_max": round(max(import_times), 4),
+        "first_response_budget_seconds": args.first_response_budget,
+        "first_response_seconds_max": round(max(first_responses), 4),
+        "slowest_modules_ms": {name: round(ms, 1) for name, ms in slowest},
+        "deferred_modules_imported": sorted(deferred_loaded),
+    }
+    print(json.dumps(report, indent=2))
+    return (
+        max(import_times) <= args.import_budget
+        and max(first_responses) <= args.first_response_budget
+        and not deferred_loaded
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--import-budget", type=float, default=2.0)
+    parser.add_argument("--first-response-budget", type=float, default=4.0)
+    parser.add_argument("--runs", type=int, default=3)
+    sys.exit(0 if main(parser.parse_args()) else 1)
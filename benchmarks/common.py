@@ -0,0 +1,44 @@
+import os
+import statistics
+import time
+
+# The benchmarks run the app in-process against a throwaway SQLite database
+# unless DATABASE_URL points somewhere else. They need httpx and aiosqlite,
+# which are not part of the production requirements.
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///./benchmark.db")
+os.environ.setdefault("AUTO_MIGRATE", "1")
+# Every request comes from one client and mostly one account; measure the
+# endpoints, not the rate limiter.
+for scope in ("LOGIN_IP", "LOGIN_USER", "REGISTER_IP", "BOOKING_IP"):
+    os.environ.setdefault(f"RATE_LIMIT_{scope}", "off")
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of numbers."""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def summarize(latencies, elapsed=None):
+    """Latency summary in milliseconds, plus throughput when elapsed is given."""
+    summary = {
+        "requests": len(latencies),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3) if latencies else None,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3) if latencies else None,
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3) if latencies else None,
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3) if latencies else None,
+        "max_ms": round(max(latencies) * 1000, 3) if latencies else None,
+    }
+    if elapsed:
+        summary["throughput_rps"] = round(len(latencies) / elapsed, 1)
+    return summary
+
+
+async def timed(coro):
+    """Await a request coroutine and return (response, seconds)."""
+    started = time.perf_counter()
+    response = await coro
+    return response, time.perf_counter() - started
@@ -0,0 +1,152 @@
+"""
+Audit which routes use the database and how long they hold a connection.
+
+    python -m benchmarks.db_audit
+
+Statically, every route is classified by the session dependency it declares:
+"write" (get_db), "read" (get_read_db) or none. Then a few requests are sent
+to the in-process app while pool events count the connections each one
+checks out and for how long. Prints a JSON report and exits with status 1
+when a rule below is broken:
+
+- routes in NO_SESSION declare no session at all;
+- GET routes use the read session, which hands its connection back after
+  every query instead of holding it until the request ends;
+- requests in NO_CHECKOUT (e.g. rejected on role before any query) never
+  check out a connection.
+"""
+import asyncio
+import json
+import sys
+import time
+
+import benchmarks.common  # noqa: F401  (sets the benchmark DATABASE_URL)
+
+import httpx
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from database import get_engine
+from database.database import get_db, get_read_db
+from main import app, init_db
+
+SESSION_KINDS = {get_db: "write", get_read_db: "read"}
+
+# Routes that must not depend on a session.
+NO_SESSION = {
+    ("GET", "/"),
+    ("GET", "/dashboard/"),
+    ("GET", "/pool-stats"),
+    ("GET", "/metrics"),
+    ("GET", "/api/availability/stream"),
+}
+
+# (name, method, url, account) requests that must not check out a connection.
+NO_CHECKOUT = [
+    ("dashboard", "GET", "/dashboard/", "user"),
+    ("admin bookings as user", "GET", "/api/admin-bookings", "user"),
+    ("utilization as user", "GET", "/api/analytics/utilization?from=2030-01-01", "user"),
+]
+
+# Requests that do read, reported for their checkout count and hold time.
+MEASURED = [
+    ("user bookings", "GET", "/api/user-bookings", "user"),
+    ("room availability", "GET", "/api/room-availability?date=2030-01-07", "user"),
+    ("inventory page", "GET", "/inventory/", "admin"),
+    ("admin bookings", "GET", "/api/admin-bookings?from=2030-01-01&to=2030-01-31", "admin"),
+]
+
+PASSWORDS = {"user": "userpass", "admin": "adminpass"}
+
+
+def session_kinds(dependant):
+    """Session dependencies anywhere in a route's dependency tree."""
+    kinds = set()
+    for dependency in dependant.dependencies:
+        if dependency.call in SESSION_KINDS:
+            kinds.add(SESSION_KINDS[dependency.call])
+        kinds |= session_kinds(dependency)
+    return kinds
+
+
+def audit_routes():
+    routes, problems = {}, []
+    for route in app.routes:
+        if not isinstance(route, APIRoute):
+            continue
+        kinds = session_kinds(route.dependant)
+        for method in sorted(route.methods):
+            routes[f"{method} {route.path}"] = "+".join(sorted(kinds)) or None
+            if (method, route.path) in NO_SESSION and kinds:
+                problems.append(f"{method} {route.path} declares a session it should not need")
+            if method == "GET" and "write" in kinds:
+                problems.append(f"{method} {route.path} holds a write session; use get_read_db")
+    return routes, problems
+
+
+class CheckoutRecorder:
+    """Counts pool checkouts and the seconds connections spend checked out."""
+
+    def __init__(self, pool):
+        self.checkouts = 0
+        self.held = 0.0
+        self._since = {}
+        event.listen(pool, "checkout", self.on_checkout)
+        event.listen(pool, "checkin", self.on_checkin)
+
+    def on_checkout(self, dbapi_connection, record, proxy):
+        self.checkouts += 1
+        self._since[id(record)] = time.perf_counter()
+
+    def on_checkin(self, dbapi_connection, record):
+        started = self._since.pop(id(record), None)
+        if started is not None:
+            self.held += time.perf_counter() - started
+
+    def reset(self):
+        self.checkouts, self.held = 0, 0.0
+
+
+async def measure(client, recorder, tokens, method, url, account, runs=20):
+    headers = {"Authorization": f"Bearer {tokens[account]}"}
+    await client.request(method, url, headers=headers)  # Warm caches and statements
+    recorder.reset()
+    started = time.perf_counter()
+    statuses = set()
+    for _ in range(runs):
+        statuses.add((await client.request(method, url, headers=headers)).status_code)
+    elapsed = time.perf_counter() - started
+    return {
+        "status": sorted(statuses),
+        "checkouts_per_request": round(recorder.checkouts / runs, 2),
+        "held_ms_per_request": round(recorder.held / runs * 1000, 3),
+        "request_ms": round(elapsed / runs * 1000, 3),
+    }
+
+
+async def main():
+    await init_db()
+    routes, problems = audit_routes()
+    recorder = CheckoutRecorder(get_engine().sync_engine.pool)
+
+    requests = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://audit") as client:
+        tokens = {}
+        for account, password in PASSWORDS.items():
+            login = await client.post("/auth/login", json={"username": account, "password": password})
+            tokens[account] = login.json()["access_token"]
+
+        for name, method, url, account in NO_CHECKOUT:
+            requests[name] = result = await measure(client, recorder, tokens, method, url, account)
+            if result["checkouts_per_request"]:
+                problems.append(f"{name}: {method} {url} checked out a connection")
+        for name, method, url, account in MEASURED:
+            requests[name] = await measure(client, recorder, tokens, method, url, account)
+
+    await get_engine().dispose()
+    print(json.dumps({"routes": routes, "requests": requests, "problems": problems}, indent=2))
+    return not problems
+
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(main()) else 1)
@@ -0,0 +1,188 @@
+"""
+Load test every router at a fixed concurrency and report latency percentiles.
+
+    python -m benchmarks.load_test --rooms 200 --bookings 20000 --inventory 20000 \
+        --concurrency 16 --requests 500 --output run.json
+
+Seeds the database named by DATABASE_URL (a throwaway SQLite file by default;
+point it at a local Postgres to test against that) with the requested
+volumes, then drives each endpoint in turn with `--concurrency` workers.
+Requests go to the app in-process unless --base-url names a running server.
+The JSON report holds throughput and p50/p95/p99 per endpoint, so two runs
+can be compared side by side.
+"""
+import argparse
+import asyncio
+import datetime
+import itertools
+import json
+import os
+import random
+import time
+
+from benchmarks.common import summarize, timed
+
+import httpx
+from sqlalchemy import delete, insert
+from database import SessionLocal
+from database.models import Booking, Inventory, Room, User
+from database.seed import DEFAULT_USERS
+from main import app, init_db
+
+BENCHMARK_DAY = datetime.date(2030, 1, 7)
+BOOKING_DAYS = 30
+SLOTS_PER_DAY = 95  # Quarter hours from 00:00 up to the one ending at 23:45
+
+
+async def seed_volumes(args):
+    """Replace users (except the defaults), rooms, bookings and inventory with generated data."""
+    user_hash = next(password_hash for name, password_hash, _ in DEFAULT_USERS if name == "user")
+    async with SessionLocal() as session:
+        await session.execute(delete(Booking))
+        await session.execute(delete(Inventory))
+        await session.execute(delete(Room))
+        await session.execute(delete(User).where(User.username.like("bench-user-%")))
+
+        if args.users:
+            await session.execute(insert(User), [
+                {"username": f"bench-user-{i}", "password_hash": user_hash, "role": "user"}
+                for i in range(args.users)
+            ])
+        await session.execute(insert(Room), [{"name": f"Room {i}"} for i in range(args.rooms)])
+        await session.commit()
+
+        room_ids = (await session.execute(Room.__table__.select().with_only_columns(Room.id))).scalars().all()
+        user_ids = (await session.execute(User.__table__.select().with_only_columns(User.id))).scalars().all()
+
+        # One-hour bookings on distinct (room, day, hour) slots, so none overlap.
+        slots = itertools.product(range(BOOKING_DAYS), range(8, 20), room_ids)
+        bookings = [
+            {
+                "user_id": random.choice(user_ids),
+                "room_id": room_id,
+                "booking_date": BENCHMARK_DAY + datetime.timedelta(days=day),
+                "start_time": datetime.time(hour),
+                "end_time": datetime.time(hour + 1),
+                "purpose": "benchmark",
+            }
+            for day, hour, room_id in itertools.islice(slots, args.bookings)
+        ]
+        for start in range(0, len(bookings), 1000):
+            await session.execute(insert(Booking), bookings[start:start + 1000])
+
+        items = [
+            {"name": f"item-{i:06d}", "quantity": random.randint(0, 500), "unit": "pcs"}
+            for i in range(args.inventory)
+        ]
+        for start in range(0, len(items), 1000):
+            await session.execute(insert(Inventory), items[start:start + 1000])
+        await session.commit()
+    return room_ids
+
+
+async def drive(client, make_request, total, concurrency):
+    """Send `total` requests from `concurrency` workers; return (summary, status counts)."""
+    latencies = []
+    statuses = {}
+    counter = itertools.count()
+
+    async def worker():
+        while (index := next(counter)) < total:
+            response, elapsed = await timed(make_request(index))
+            latencies.append(elapsed)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    summary = summarize(latencies, time.perf_counter() - started)
+    summary["status_codes"] = {str(code): count for code, count in sorted(statuses.items())}
+    return summary
+
+
+async def run(args):
+    if args.reset and os.environ["DATABASE_URL"].startswith("sqlite") and os.path.exists("benchmark.db"):
+        os.remove("benchmark.db")
+    await init_db()
+    room_ids = await seed_volumes(args)
+
+    if args.base_url:
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=60)
+    else:
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://benchmark", timeout=60)
+
+    async with client:
+        login = await client.post("/auth/login", json={"username": "user", "password": "userpass"})
+        token = login.json()["access_token"]
+        auth = {"Authorization": f"Bearer {token}"}
+        user_id = login.json()["user_id"]
+        book_day = BENCHMARK_DAY + datetime.timedelta(days=BOOKING_DAYS + 1)
+
+        def book(index):
+            # Each request takes a fresh quarter-hour slot so they all succeed.
+            room_id = room_ids[index % len(room_ids)]
+            slot = index // len(room_ids)
+            day = book_day + datetime.timedelta(days=slot // SLOTS_PER_DAY)
+            start = (slot % SLOTS_PER_DAY) * 15
+            return client.post("/api/book-room", json={
+                "user_id": user_id,
+                "room_id": room_id,
+                "booking_date": day.isoformat(),
+                "start_time": f"{start // 60:02d}:{start % 60:02d}",
+                "end_time": f"{(start + 15) // 60:02d}:{(start + 15) % 60:02d}",
+                "purpose": "benchmark",
+            })
+
+        scenarios = {
+            "POST /auth/login": lambda i: client.post(
+                "/auth/login", json={"username": "user", "password": "userpass"}),
+            "GET /api/room-availability": lambda i: client.get(
+                "/api/room-availability",
+                params={"date": (BENCHMARK_DAY + datetime.timedelta(days=i % BOOKING_DAYS)).isoformat()}),
+            "POST /api/book-room": book,
+            "GET /api/user-bookings": lambda i: client.get("/api/user-bookings", headers=auth),
+            "GET /inventory/": lambda i: client.get("/inventory/"),
+            "GET /dashboard/": lambda i: client.get("/dashboard/", headers=auth),
+        }
+
+        results = {}
+        for name, make_request in scenarios.items():
+            if args.only and args.only not in name:
+                continue
+            total = args.login_requests if name == "POST /auth/login" else args.requests
+            results[name] = await drive(client, make_request, total, args.concurrency)
+
+    return {
+        "config": {
+            "database": os.environ["DATABASE_URL"].split("://")[0],
+            "target": args.base_url or "in-process",
+            "users": args.users,
+            "rooms": args.rooms,
+            "bookings": args.bookings,
+            "inventory": args.inventory,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+        },
+        "results": results,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--rooms", type=int, default=50)
+    parser.add_argument("--bookings", type=int, default=5000)
+    parser.add_argument("--inventory", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200, help="requests per endpoint")
+    parser.add_argument("--login-requests", type=int, default=40, help="requests for the bcrypt-bound login")
+    parser.add_argument("--only", help="run only endpoints whose name contains this text")
+    parser.add_argument("--base-url", help="benchmark a running server instead of the in-process app")
+    parser.add_argument("--no-reset", dest="reset", action="store_false",
+                        help="keep the existing benchmark.db instead of starting fresh")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+    text = json.dumps(asyncio.run(run(args)), indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as output:
+            output.write(text + "\n")
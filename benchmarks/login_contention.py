@@ -0,0 +1,56 @@
+"""
+Measure /inventory/ latency while /auth/login traffic runs in parallel.
+
+    python -m benchmarks.login_contention --logins 100 --reads 400
+
+Both request streams share one event loop, the same way they share a uvicorn
+worker, so any CPU work done on the loop by the login handler shows up in the
+/inventory/ percentiles. Prints a JSON report.
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from benchmarks.common import summarize, timed
+
+import httpx
+from main import app, init_db
+
+
+async def login_worker(client, count):
+    for _ in range(count):
+        await client.post("/auth/login", json={"username": "user", "password": "userpass"})
+
+
+async def read_worker(client, count, latencies):
+    for _ in range(count):
+        _, elapsed = await timed(client.get("/inventory/"))
+        latencies.append(elapsed)
+
+
+async def measure(client, logins, reads, concurrency):
+    latencies = []
+    started = time.perf_counter()
+    login_tasks = [asyncio.create_task(login_worker(client, logins // concurrency)) for _ in range(concurrency)]
+    await asyncio.gather(*(read_worker(client, reads // concurrency, latencies) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    await asyncio.gather(*login_tasks)
+    return summarize(latencies, elapsed)
+
+
+async def main(args):
+    await init_db()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        baseline = await measure(client, 0, args.reads, args.concurrency)
+        contended = await measure(client, args.logins, args.reads, args.concurrency)
+    print(json.dumps({"inventory_only": baseline, "inventory_with_logins": contended}, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--logins", type=int, default=100)
+    parser.add_argument("--reads", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=8)
+    asyncio.run(main(parser.parse_args()))
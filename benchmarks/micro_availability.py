@@ -0,0 +1,92 @@
+"""
+Micro-benchmark of the pure-Python availability computation.
+
+    python -m benchmarks.micro_availability --rooms 500 --bookings-per-room 12
+    python -m benchmarks.micro_availability --save baseline.json
+    python -m benchmarks.micro_availability --compare baseline.json --tolerance 0.2
+
+No database or HTTP is involved: it times booking.availability on generated
+bookings, so it isolates the CPU cost of the sweep. With --compare it exits
+with status 1 when the median is more than `tolerance` slower than the saved
+baseline, which makes it usable as a regression gate.
+"""
+import argparse
+import datetime
+import json
+import random
+import statistics
+import sys
+import time
+
+from booking.availability import compute_availability
+
+DAY = datetime.date(2030, 1, 7)
+
+
+def generate(rooms, bookings_per_room, days, seed=7):
+    rng = random.Random(seed)
+    rows = []
+    for room_id in range(1, rooms + 1):
+        for day in range(days):
+            for _ in range(bookings_per_room):
+                start = rng.randrange(0, 23 * 4) * 15
+                length = rng.choice((15, 30, 60, 90, 120))
+                end = min(start + length, 23 * 60 + 59)
+                rows.append((
+                    room_id,
+                    DAY + datetime.timedelta(days=day),
+                    datetime.time(start // 60, start % 60),
+                    datetime.time(end // 60, end % 60),
+                ))
+    rows.sort()
+    return list(range(1, rooms + 1)), rows
+
+
+def main(args):
+    room_ids, rows = generate(args.rooms, args.bookings_per_room, args.days)
+    end_date = DAY + datetime.timedelta(days=args.days - 1)
+
+    timings = []
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        compute_availability(room_ids, rows, DAY, end_date, args.granularity)
+        timings.append(time.perf_counter() - started)
+
+    report = {
+        "rooms": args.rooms,
+        "days": args.days,
+        "bookings": len(rows),
+        "granularity": args.granularity,
+        "repeat": args.repeat,
+        "median_ms": round(statistics.median(timings) * 1000, 3),
+        "min_ms": round(min(timings) * 1000, 3),
+    }
+
+    ok = True
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+        limit = baseline["median_ms"] * (1 + args.tolerance)
+        report["baseline_median_ms"] = baseline["median_ms"]
+        report["regression"] = report["median_ms"] > limit
+        ok = not report["regression"]
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.save:
+        with open(args.save, "w") as output:
+            output.write(text + "\n")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rooms", type=int, default=300)
+    parser.add_argument("--bookings-per-room", type=int, default=10)
+    parser.add_argument("--days", type=int, default=1)
+    parser.add_argument("--granularity", type=int, default=15, choices=(15, 30, 60))
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--save", help="write the report to this file (e.g. as a baseline)")
+    parser.add_argument("--compare", help="baseline report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown, 0.2 = 20%%")
+    sys.exit(0 if main(parser.parse_args()) else 1)
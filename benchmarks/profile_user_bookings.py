@@ -0,0 +1,100 @@
+"""
+Profile the Python overhead of GET /api/user-bookings.
+
+    python -m benchmarks.profile_user_bookings --bookings 200 --requests 300 --top 25
+
+Seeds `--bookings` rows for the default "user" account, warms up, then sends
+`--requests` sequential requests to the in-process app under cProfile. The
+JSON summary on stdout holds the mean latency and the number of Python
+function calls per request, the figure to compare between two versions; the
+hottest functions go to stderr. --save writes the raw pstats file for
+snakeviz or `python -m pstats`.
+"""
+import argparse
+import asyncio
+import cProfile
+import datetime
+import io
+import json
+import pstats
+import sys
+import time
+
+import benchmarks.common  # noqa: F401  (sets the benchmark DATABASE_URL)
+
+import httpx
+from sqlalchemy import delete, insert, select
+from database import SessionLocal, get_engine
+from database.models import Booking, Room, User
+from main import app, init_db
+
+BENCHMARK_DAY = datetime.date(2030, 1, 7)
+
+
+async def seed_bookings(count):
+    async with SessionLocal() as session:
+        await session.execute(delete(Booking))
+        user_id = (await session.execute(select(User.id).where(User.username == "user"))).scalar_one()
+        room_id = (await session.execute(select(Room.id).limit(1))).scalar_one()
+        await session.execute(insert(Booking), [
+            {
+                "user_id": user_id,
+                "room_id": room_id,
+                "booking_date": BENCHMARK_DAY + datetime.timedelta(days=i // 12),
+                "start_time": datetime.time(8 + i % 12),
+                "end_time": datetime.time(9 + i % 12),
+                "purpose": "benchmark",
+            }
+            for i in range(count)
+        ])
+        await session.commit()
+
+
+async def run(args):
+    await init_db()
+    await seed_bookings(args.bookings)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        login = await client.post("/auth/login", json={"username": "user", "password": "userpass"})
+        auth = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+        for _ in range(args.warmup):
+            response = await client.get("/api/user-bookings", headers=auth)
+            assert len(response.json()["bookings"]) == args.bookings
+
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        profiler.enable()
+        for _ in range(args.requests):
+            await client.get("/api/user-bookings", headers=auth)
+        profiler.disable()
+        elapsed = time.perf_counter() - started
+
+    await get_engine().dispose()
+
+    stats = pstats.Stats(profiler)
+    if args.save:
+        stats.dump_stats(args.save)
+    report = io.StringIO()
+    pstats.Stats(profiler, stream=report).sort_stats("tottime").print_stats(args.top)
+    print(report.getvalue(), file=sys.stderr)
+
+    return {
+        "bookings": args.bookings,
+        "requests": args.requests,
+        "mean_ms": round(elapsed / args.requests * 1000, 3),
+        "calls_per_request": round(stats.total_calls / args.requests),
+        "primitive_calls_per_request": round(stats.prim_calls / args.requests),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--bookings", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--top", type=int, default=25, help="functions to list, by own time")
+    parser.add_argument("--save", help="write the raw profile to this pstats file")
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args)), indent=2))
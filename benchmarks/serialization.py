@@ -0,0 +1,79 @@
+"""
+Compare the CPU cost of serializing a large booking list.
+
+    python -m benchmarks.serialization --bookings 2000
+
+"before" is the old path: jsonable_encoder over ORM instances followed by
+json.dumps. "after" is the current one: column rows turned into dicts,
+validated and serialized by the BookingList response model and rendered by
+ORJSONResponse. No database is needed; the rows are built in memory.
+"""
+import argparse
+import datetime
+import json
+import statistics
+import time
+
+import benchmarks.common  # noqa: F401  (sets the benchmark DATABASE_URL)
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import ORJSONResponse
+from pydantic import TypeAdapter
+from database.models import Booking
+from booking.schemas import BookingList
+
+
+def make_rows(count):
+    day = datetime.date(2030, 1, 7)
+    return [
+        {
+            "id": i,
+            "user_id": i % 50,
+            "room_id": i % 20,
+            "booking_date": day + datetime.timedelta(days=i % 30),
+            "start_time": datetime.time(8 + i % 10),
+            "end_time": datetime.time(9 + i % 10),
+            "purpose": "benchmark booking",
+        }
+        for i in range(count)
+    ]
+
+
+def before(orm_objects):
+    return json.dumps({"bookings": jsonable_encoder(orm_objects)}).encode("utf-8")
+
+
+def after(rows, adapter):
+    validated = adapter.validate_python({"bookings": rows})
+    return ORJSONResponse(adapter.dump_python(validated, mode="json", exclude_none=True)).body
+
+
+def measure(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.process_time()
+        func()
+        timings.append(time.process_time() - started)
+    return round(statistics.median(timings) * 1000, 3)
+
+
+def main(args):
+    rows = make_rows(args.bookings)
+    orm_objects = [Booking(**row) for row in rows]
+    adapter = TypeAdapter(BookingList)
+    assert json.loads(before(orm_objects))["bookings"] == json.loads(after(rows, adapter))["bookings"]
+
+    before_ms = measure(lambda: before(orm_objects), args.repeat)
+    after_ms = measure(lambda: after(rows, adapter), args.repeat)
+    print(json.dumps({
+        "bookings": args.bookings,
+        "before_cpu_ms": before_ms,
+        "after_cpu_ms": after_ms,
+        "speedup": round(before_ms / after_ms, 2) if after_ms else None,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--bookings", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=20)
+    main(parser.parse_args())
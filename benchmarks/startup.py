@@ -0,0 +1,47 @@
+"""
+Check that app startup stays within its time budget.
+
+    python -m benchmarks.startup --budget 0.5
+
+Migrations are applied first, as a deploy would, and then the startup work
+of one worker (schema version check and pool warm-up) is timed on the
+already migrated database. Prints a JSON report and exits with status 1 when the
+slowest run exceeds the budget.
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+import benchmarks.common  # noqa: F401  (sets the benchmark DATABASE_URL)
+from database import get_engine
+from database.database import warm_pool
+from database.migrations import upgrade
+from main import init_db
+
+
+async def main(args):
+    await upgrade(get_engine())
+    timings = []
+    for _ in range(args.runs):
+        started = time.perf_counter()
+        await init_db()
+        await warm_pool()
+        timings.append(time.perf_counter() - started)
+
+    report = {
+        "runs": args.runs,
+        "budget_seconds": args.budget,
+        "max_seconds": round(max(timings), 4),
+        "mean_seconds": round(sum(timings) / len(timings), 4),
+    }
+    print(json.dumps(report, indent=2))
+    return max(timings) <= args.budget
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--budget", type=float, default=0.5)
+    parser.add_argument("--runs", type=int, default=5)
+    sys.exit(0 if asyncio.run(main(parser.parse_args())) else 1)
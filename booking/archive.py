@@ -0,0 +1,53 @@
+"""
+Move old bookings into cold storage, meant to run daily from cron or a
+scheduled job:
+
+    python -m booking.archive                      # BOOKING_RETENTION_DAYS, default 365
+    python -m booking.archive --retention-days 90
+
+Every whole month that ended before the retention window is moved from
+`bookings` to `bookings_archive`, one month per transaction, so the run can
+be interrupted and repeated. Booking history and the utilization rollups
+still include archived bookings; the conflict checks and availability only
+look at `bookings`. The run also creates the booking partitions for the
+months ahead on PostgreSQL.
+"""
+import argparse
+import asyncio
+import os
+from datetime import date, timedelta
+from database import get_engine
+from database.partitions import (
+    PARTITIONS_AHEAD, archivable_months, archive_month, ensure_partitions, month_start,
+)
+
+RETENTION_DAYS = int(os.getenv("BOOKING_RETENTION_DAYS", "365"))
+
+
+async def run(retention_days: int = RETENTION_DAYS, today: date = None):
+    today = today or date.today()
+    cutoff = month_start(today - timedelta(days=retention_days))
+    engine = get_engine()
+    async with engine.begin() as conn:
+        created = await conn.run_sync(ensure_partitions, today, PARTITIONS_AHEAD)
+        months = await conn.run_sync(archivable_months, cutoff)
+    if created:
+        print(f"created booking partitions: {', '.join(f'{month:%Y-%m}' for month in created)}")
+
+    total = 0
+    for month in months:
+        async with engine.begin() as conn:
+            moved = await conn.run_sync(archive_month, month)
+        if moved:
+            print(f"{month:%Y-%m}: {moved} bookings archived")
+        total += moved
+    print(f"archived {total} bookings dated before {cutoff}")
+    await engine.dispose()
+    return total
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Archive bookings older than the retention window.")
+    parser.add_argument("--retention-days", type=int, default=RETENTION_DAYS,
+                        help=f"keep this many days of past bookings hot (default {RETENTION_DAYS})")
+    asyncio.run(run(parser.parse_args().retention_days))
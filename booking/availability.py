@@ -0,0 +1,132 @@
+from datetime import date, time, timedelta
+
+MINUTES_PER_DAY = 24 * 60
+ALLOWED_GRANULARITIES = (15, 30, 60)
+
+
+def to_minutes(value: time) -> int:
+    """Convert a time of day to minutes since midnight."""
+    return value.hour * 60 + value.minute
+
+
+def format_minutes(minutes: int) -> str:
+    """Format minutes since midnight as HH:MM (1440 is shown as 24:00)."""
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def format_time_of_day(minutes: int) -> str:
+    """Format minutes since midnight like str(time), HH:MM:SS; 1440 is 00:00:00."""
+    minutes %= MINUTES_PER_DAY
+    return f"{minutes // 60:02d}:{minutes % 60:02d}:00"
+
+
+def merge_intervals(intervals):
+    """
+    Sort and merge (start, end) minute intervals.
+    Intervals that overlap or touch are combined, empty intervals are dropped.
+    """
+    merged = []
+    for start, end in sorted(intervals):
+        if end <= start:
+            continue
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+
+def free_intervals(merged, day_start: int = 0, day_end: int = MINUTES_PER_DAY):
+    """Return the gaps between already merged intervals within [day_start, day_end)."""
+    free = []
+    cursor = day_start
+    for start, end in merged:
+        if end <= cursor:
+            continue
+        if start >= day_end:
+            break
+        if start > cursor:
+            free.append((cursor, start))
+        cursor = max(cursor, end)
+    if cursor < day_end:
+        free.append((cursor, day_end))
+    return free
+
+
+def free_slots(free, granularity: int):
+    """
+    Yield the start of every slot of `granularity` minutes that fits entirely
+    inside one of the free intervals. Slots are aligned to midnight.
+    """
+    for start, end in free:
+        slot = -(-start // granularity) * granularity  # Round up to the slot grid
+        while slot + granularity <= end:
+            yield slot
+            slot += granularity
+
+
+def room_day_availability(intervals, granularity: int = 60, day_start: int = 0, day_end: int = MINUTES_PER_DAY):
+    """
+    Compute availability for one room on one day from its booked (start, end)
+    minute intervals in a single sort-and-sweep pass. Free time is limited to
+    the [day_start, day_end) window.
+    """
+    merged = merge_intervals(intervals)
+    free = free_intervals(merged, day_start, day_end)
+    return {
+        # Booked times keep the HH:MM:SS format of the stored booking times.
+        "booked_times": [(format_time_of_day(s), format_time_of_day(e)) for s, e in merged],
+        "free_intervals": [(format_minutes(s), format_minutes(e)) for s, e in free],
+        "available_times": [format_minutes(s) for s in free_slots(free, granularity)],
+    }
+
+
+def booking_interval(start_time: time, end_time: time):
+    """Minute interval of a booking; an end of 00:00 means the end of the day."""
+    start = to_minutes(start_time)
+    end = to_minutes(end_time) or MINUTES_PER_DAY
+    return start, end
+
+
+def date_range(start_date: date, end_date: date):
+    """Yield every date from start_date to end_date inclusive."""
+    current = start_date
+    while current <= end_date:
+        yield current
+        current += timedelta(days=1)
+
+
+def group_intervals(bookings):
+    """Group (room_id, booking_date, start_time, end_time) rows into minute intervals per (date, room)."""
+    intervals = {}
+    for room_id, booking_date, start_time, end_time in bookings:
+        intervals.setdefault((booking_date, room_id), []).append(booking_interval(start_time, end_time))
+    return intervals
+
+
+def availability_from_intervals(room_ids, intervals, start_date: date, end_date: date, granularity: int = 60,
+                                day_start: int = 0, day_end: int = MINUTES_PER_DAY):
+    """
+    Build availability for every room and day in the range from booked minute
+    intervals keyed by (date, room_id). The result maps ISO date -> room_id ->
+    room_day_availability().
+    """
+    return {
+        day.isoformat(): {
+            room_id: room_day_availability(intervals.get((day, room_id), ()), granularity, day_start, day_end)
+            for room_id in room_ids
+        }
+        for day in date_range(start_date, end_date)
+    }
+
+
+def compute_availability(room_ids, bookings, start_date: date, end_date: date, granularity: int = 60,
+                         day_start: int = 0, day_end: int = MINUTES_PER_DAY):
+    """
+    Build availability for every room and day in the range.
+    `bookings` is an iterable of (room_id, booking_date, start_time, end_time) rows.
+    """
+    return availability_from_intervals(
+        room_ids, group_intervals(bookings), start_date, end_date, granularity, day_start, day_end
+    )
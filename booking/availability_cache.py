@@ -0,0 +1,266 @@
+import json
+import os
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from datetime import date
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from database.database import ReadSessionLocal, get_engine
+from database.models import Room, Booking as BookingModel
+from booking.availability import date_range, group_intervals, merge_intervals
+
+# AVAILABILITY_CACHE_URL=redis://host:6379/0 shares the cache between workers
+# (any Redis-compatible server works, the `redis` package must be installed).
+# Without it each worker keeps its own in-memory LRU; AVAILABILITY_CACHE_SIZE=0
+# turns that off (serve.py does so when it starts several workers).
+AVAILABILITY_CACHE_URL = os.getenv("AVAILABILITY_CACHE_URL")
+AVAILABILITY_CACHE_SIZE = int(os.getenv("AVAILABILITY_CACHE_SIZE", "20000"))
+# Safety net for writes that bypass invalidation (manual SQL, other services).
+AVAILABILITY_CACHE_TTL = int(os.getenv("AVAILABILITY_CACHE_TTL", "300"))
+
+
+
+class InMemoryBackend:
+    """Size-bounded LRU with per-entry expiry, local to one worker process."""
+
+    def __init__(self, max_entries: int, ttl: int):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        # Bumped on every delete; a fill is dropped when its key was deleted
+        # after the version the reader took before querying.
+        self.generation = 0
+        self.deleted_at = {}
+        self.deleted_floor = 0
+
+    async def get_many(self, keys):
+        now = time.monotonic()
+        found = {}
+        for key in keys:
+            entry = self.entries.get(key)
+            if entry is None:
+                continue
+            expires_at, value = entry
+            if expires_at <= now:
+                del self.entries[key]
+                continue
+            self.entries.move_to_end(key)
+            found[key] = value
+        return found
+
+    async def versions(self, keys):
+        return {key: self.generation for key in keys}
+
+    async def set_many(self, values: dict, versions: dict = None):
+        """Store the values; with `versions`, skip keys deleted since those were taken."""
+        expires_at = time.monotonic() + self.ttl
+        for key, value in values.items():
+            if versions is not None and max(self.deleted_floor, self.deleted_at.get(key, 0)) > versions[key]:
+                continue
+            self.entries[key] = (expires_at, value)
+            self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    async def delete(self, keys):
+        self.generation += 1
+        for key in keys:
+            self.entries.pop(key, None)
+            self.deleted_at[key] = self.generation
+        if len(self.deleted_at) > self.max_entries:
+            # Forget per-key history but treat everything as just deleted.
+            self.deleted_at.clear()
+            self.deleted_floor = self.generation
+
+
+# Sets each value only while its version key still holds the version read
+# before the query. KEYS are (key, version key) pairs, ARGV the TTL followed
+# by (version, value) pairs; a missing version key reads as "".
+FILL_SCRIPT = """
+for i = 1, #KEYS, 2 do
+    local version = redis.call('GET', KEYS[i + 1]) or ''
+    if version == ARGV[i + 1] then
+        redis.call('SET', KEYS[i], ARGV[i + 2], 'EX', ARGV[1])
+    end
+end
+"""
+
+# Version keys outlive the values by far, so a counter only expires (and
+# restarts) once no reader can still hold a version read from it.
+VERSION_TTL = 86400
+
+
+class RedisBackend:
+    """
+    Shared backend on a Redis-compatible server; values are stored as JSON.
+    Every key has a version counter that delete() increments, so a worker that
+    read the database before another worker's write cannot store its stale
+    result after that write's invalidation.
+    """
+
+    def __init__(self, url: str, ttl: int):
+        import redis.asyncio as redis  # Optional dependency, only needed when configured
+
+        self.client = redis.from_url(url)
+        self.ttl = ttl
+        self.fill = self.client.register_script(FILL_SCRIPT)
+
+    @staticmethod
+    def version_key(key: str) -> str:
+        return f"{key}:version"
+
+    async def get_many(self, keys):
+        keys = list(keys)
+        if not keys:
+            return {}
+        values = await self.client.mget(keys)
+        return {key: json.loads(value) for key, value in zip(keys, values) if value is not None}
+
+    async def versions(self, keys):
+        keys = list(keys)
+        if not keys:
+            return {}
+        versions = await self.client.mget([self.version_key(key) for key in keys])
+        return {key: version or b"" for key, version in zip(keys, versions)}
+
+    async def set_many(self, values: dict, versions: dict = None):
+        """Store the values; with `versions`, skip keys deleted since those were taken."""
+        if not values:
+            return
+        if versions is not None:
+            keys, args = [], [self.ttl]
+            for key, value in values.items():
+                keys += [key, self.version_key(key)]
+                args += [versions[key], json.dumps(value)]
+            await self.fill(keys=keys, args=args)
+            return
+        async with self.client.pipeline(transaction=False) as pipe:
+            for key, value in values.items():
+                pipe.set(key, json.dumps(value), ex=self.ttl)
+            await pipe.execute()
+
+    async def delete(self, keys):
+        keys = list(keys)
+        if not keys:
+            return
+        async with self.client.pipeline(transaction=True) as pipe:
+            for key in keys:
+                pipe.incr(self.version_key(key))
+                pipe.expire(self.version_key(key), VERSION_TTL)
+            pipe.delete(*keys)
+            await pipe.execute()
+
+
+@asynccontextmanager
+async def fill_session(db: AsyncSession):
+    """
+    The session to fill the cache from. A read on a lagging replica may not
+    see a booking whose invalidation already ran, and storing that result
+    would serve it to every client, the writer included, until the TTL ends;
+    so misses are loaded from the primary when `db` is on a replica.
+    """
+    if "replica" not in db.info:
+        yield db
+    else:
+        async with ReadSessionLocal(bind=get_engine()) as primary:
+            yield primary
+
+
+class AvailabilityCache:
+    """
+    Merged booked intervals per (date, resource), filled from the database on
+    a miss and invalidated by booking writes. Free slots are derived from the
+    cached intervals on every request, so one entry serves any granularity.
+
+    `kind` namespaces the keys; `resource_query` selects the resource ids and
+    `interval_columns` are the (resource_id, date, start_time, end_time)
+    columns of the table holding the bookings.
+    """
+
+    def __init__(self, backend, kind: str, resource_query, interval_columns):
+        self.backend = backend
+        self.kind = kind
+        self.resource_query = resource_query
+        self.interval_columns = interval_columns
+        self.resources_key = f"availability:{kind}:ids"
+        self.hits = 0
+        self.misses = 0
+
+    def day_key(self, day: date, resource_id: int) -> str:
+        return f"availability:{self.kind}:{day.isoformat()}:{resource_id}"
+
+    async def resource_ids(self, db: AsyncSession):
+        cached = await self.backend.get_many([self.resources_key])
+        if self.resources_key in cached:
+            return cached[self.resources_key]
+        async with fill_session(db) as session:
+            result = await session.execute(self.resource_query)
+        resource_ids = list(result.scalars().all())
+        await self.backend.set_many({self.resources_key: resource_ids})
+        return resource_ids
+
+    async def booked_intervals(self, db: AsyncSession, resource_ids, start_date: date, end_date: date):
+        """Merged booked minute intervals keyed by (date, resource_id) for the whole range."""
+        keys = {
+            self.day_key(day, resource_id): (day, resource_id)
+            for day in date_range(start_date, end_date)
+            for resource_id in resource_ids
+        }
+        cached = await self.backend.get_many(keys)
+        self.hits += len(cached)
+        self.misses += len(keys) - len(cached)
+
+        intervals = {keys[key]: value for key, value in cached.items()}
+        missing = [keys[key] for key in keys if key not in cached]
+        if missing:
+            # Taken before the query, so a write invalidating these keys while
+            # it runs keeps the result out of the cache.
+            versions = await self.backend.versions([self.day_key(day, resource_id) for day, resource_id in missing])
+            resource_column, date_column = self.interval_columns[:2]
+            async with fill_session(db) as session:
+                result = await session.execute(
+                    select(*self.interval_columns).where(
+                        date_column.in_({day for day, _ in missing}),
+                        resource_column.in_({resource_id for _, resource_id in missing}),
+                    )
+                )
+            loaded = group_intervals(result.all())
+
+            fresh = {}
+            for day, resource_id in missing:
+                merged = [list(interval) for interval in merge_intervals(loaded.get((day, resource_id), ()))]
+                intervals[(day, resource_id)] = merged
+                fresh[self.day_key(day, resource_id)] = merged
+            await self.backend.set_many(fresh, versions)
+
+        return intervals
+
+    async def invalidate(self, keys):
+        """Drop the entries for the given (resource_id, date) pairs."""
+        await self.backend.delete([self.day_key(day, resource_id) for resource_id, day in keys])
+
+    async def invalidate_resources(self):
+        """Forget the cached id list after resources are added or removed."""
+        await self.backend.delete([self.resources_key])
+
+    def stats(self):
+        labels = f'{{kind="{self.kind}"}}'
+        return {
+            f"availability_cache_hits_total{labels}": self.hits,
+            f"availability_cache_misses_total{labels}": self.misses,
+        }
+
+
+def make_backend():
+    if AVAILABILITY_CACHE_URL:
+        return RedisBackend(AVAILABILITY_CACHE_URL, AVAILABILITY_CACHE_TTL)
+    return InMemoryBackend(AVAILABILITY_CACHE_SIZE, AVAILABILITY_CACHE_TTL)
+
+
+availability_cache = AvailabilityCache(
+    make_backend(),
+    "room",
+    select(Room.id).order_by(Room.id),
+    (BookingModel.room_id, BookingModel.booking_date, BookingModel.start_time, BookingModel.end_time),
+)
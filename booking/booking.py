@@ -1,24 +1,35 @@
-from fastapi import APIRouter, HTTPException, Depends
-from fastapi.encoders import jsonable_encoder
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Depends, Query
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
 from datetime import date, time, datetime
-from database.database import get_db
-from database.models import Room, Booking as BookingModel
-import jwt
-from fastapi import Request, HTTPException
+from database.database import get_db, get_read_db
+from database.versions import bump_versions, etag_matches, get_version, make_etag, not_modified, user_bookings_scope
+from fastapi import Request
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.future import select
-from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.sql import text
-from database.models import User
-from fastapi import status
-
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
+from booking.availability import (
+    ALLOWED_GRANULARITIES,
+    MINUTES_PER_DAY,
+    availability_from_intervals,
+    to_minutes,
+)
+from booking.availability_cache import availability_cache
+from booking.events import publish_booked, sse_stream
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from booking import queries
+from booking.conflicts import lock_room_dates
+from booking.recurrence import MAX_BATCH_ITEMS, BatchBooking, batch_items, find_conflicts
+from booking.schemas import AdminBooking, AdminBookingPage, BookingList
+from auth.tokens import get_current_user_id, require_admin
+from auth.ratelimit import booking_limit, cpu_heavy
+from analytics.rollups import record_bookings
 
 router = APIRouter()
 
-SECRET_KEY = "your_secret_key"
+MAX_AVAILABILITY_DAYS = 62
+ADMIN_PAGE_SIZE = 100
+MAX_ADMIN_PAGE_SIZE = 500
+# Clients may keep the list but must revalidate it; a 304 costs one lookup.
+USER_BOOKINGS_CACHE_CONTROL = "private, no-cache"
 
 
 class Booking(BaseModel):
@@ -29,200 +40,212 @@ class Booking(BaseModel):
     end_time: time  # End time of the booking (HH:MM)
     purpose: str  # Purpose of the booking
 
-@router.get("/user-bookings")
-async def get_user_bookings(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)):
+def bookings_response(bookings):
+    # Rows go straight to orjson; BookingList stays the documented schema.
+    if not bookings:
+        return ORJSONResponse({"message": "No bookings found for this user.", "bookings": []})
+    return ORJSONResponse({"bookings": bookings})  # No message key, as before
+
+
+async def user_bookings_response(request: Request, db: AsyncSession, user_id: int):
+    """
+    The user's bookings with an ETag from their change counter, or 304 when
+    the client already has that version. The counter is read before the rows,
+    so a write landing in between only makes the tag older than the data.
+    """
+    scope = user_bookings_scope(user_id)
+    etag = make_etag(scope, await get_version(db, scope))
+    if etag_matches(request, etag):
+        return not_modified(etag, USER_BOOKINGS_CACHE_CONTROL)
+
+    response = bookings_response(await queries.user_bookings(db, user_id))
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = USER_BOOKINGS_CACHE_CONTROL
+    return response
+
+
+@router.get("/user-bookings", response_model=BookingList, response_model_exclude_none=True)
+async def get_user_bookings(
+        request: Request,
+        token_user_id: int = Depends(get_current_user_id),
+        db: AsyncSession = Depends(get_read_db),
+):
     """
     Endpoint to fetch all bookings for the authenticated user using the token.
     """
     try:
-        # Decode the JWT token to extract the user ID
-        payload = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
-        token_user_id = payload.get("sub")  # Extract the user ID (subject) from the token
+        return await user_bookings_response(request, db, token_user_id)
 
-        if not token_user_id:
-            raise HTTPException(
-                status_code=401, detail="Invalid token: user ID not found"
-            )
-
-        # Fetch all bookings for the user identified by the token
-        result = await db.execute(
-            select(BookingModel).where(
-                BookingModel.user_id == int(token_user_id)
-            )
-        )
-        user_bookings = result.scalars().all()
+    except Exception as e:
+        print(f"Error fetching user bookings: {e}")
+        raise HTTPException(status_code=500, detail="An error occurred while retrieving bookings.")
 
-        # If no bookings are found, respond gracefully
-        if not user_bookings:
-            return {"message": "No bookings found for this user.", "bookings": []}
 
-        return {"bookings": jsonable_encoder(user_bookings)}
+@router.get("/user-bookings/{user_id}", response_model=BookingList, response_model_exclude_none=True)
+async def get_bookings_for_user(user_id: int, request: Request, db: AsyncSession = Depends(get_read_db)):
+    """
+    Endpoint to fetch all bookings for a specific user by user_id.
+    """
+    try:
+        return await user_bookings_response(request, db, user_id)
 
-    except jwt.ExpiredSignatureError:
-        raise HTTPException(status_code=401, detail="Token expired")
-    except jwt.PyJWTError:
-        raise HTTPException(status_code=401, detail="Invalid token")
     except Exception as e:
         print(f"Error fetching user bookings: {e}")
         raise HTTPException(status_code=500, detail="An error occurred while retrieving bookings.")
 
 
-@router.get("/user-bookings/{user_id}")
-async def get_user_bookings(user_id: int, db: AsyncSession = Depends(get_db)):
+def availability_window(date, start_date, end_date, start_time, end_time, granularity):
     """
-    Endpoint to fetch all bookings for a specific user by user_id.
+    Validate the availability query parameters shared by rooms and equipment.
+    Returns (range_start, range_end, day_start, day_end) with the window in
+    minutes; raises HTTPException, or ValueError for malformed dates/times.
     """
-    try:
-        # Fetch all bookings for the user from the database
-        result = await db.execute(
-            select(BookingModel).where(
-                BookingModel.user_id == user_id
-            )
+    if granularity not in ALLOWED_GRANULARITIES:
+        raise HTTPException(
+            status_code=400, detail=f"granularity must be one of {ALLOWED_GRANULARITIES}."
         )
-        user_bookings = result.scalars().all()
 
-        # If no bookings are found, return an empty response
-        if not user_bookings:
-            return {"message": "No bookings found for this user.", "bookings": []}
+    if date:
+        range_start = range_end = datetime.strptime(date, "%Y-%m-%d").date()
+    elif start_date:
+        range_start = datetime.strptime(start_date, "%Y-%m-%d").date()
+        range_end = datetime.strptime(end_date, "%Y-%m-%d").date() if end_date else range_start
+    else:
+        raise HTTPException(
+            status_code=400, detail="The 'date' or 'start_date' query parameter is required."
+        )
 
-        return {"bookings": jsonable_encoder(user_bookings)}
+    if range_end < range_start:
+        raise HTTPException(status_code=400, detail="end_date must not be before start_date.")
+    if (range_end - range_start).days >= MAX_AVAILABILITY_DAYS:
+        raise HTTPException(
+            status_code=400, detail=f"Date range is limited to {MAX_AVAILABILITY_DAYS} days."
+        )
 
-    except Exception as e:
-        print(f"Error fetching user bookings: {e}")
-        raise HTTPException(status_code=500, detail="An error occurred while retrieving bookings.")
+    day_start = to_minutes(datetime.strptime(start_time, "%H:%M").time()) if start_time else 0
+    day_end = to_minutes(datetime.strptime(end_time, "%H:%M").time()) if end_time else MINUTES_PER_DAY
+    if day_end <= day_start:
+        day_end = MINUTES_PER_DAY
 
+    return range_start, range_end, day_start, day_end
 
 
-async def get_user_role(request: Request):
-    """Extract user role from the JWT token."""
-    token = request.headers.get("Authorization", "").replace("Bearer ", "")
+async def range_cpu_limit(start_date: str = None, end_date: str = None):
+    """
+    Take a cpu_heavy slot for multi-day availability, which can spend seconds
+    of CPU on the event loop; a single day is cheap and stays uncapped.
+    """
+    if start_date and end_date and end_date != start_date:
+        async with cpu_heavy.slot():
+            yield
+    else:
+        yield
 
-    if not token:
-        raise HTTPException(status_code=401, detail="Authorization token missing")
 
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
-        return payload.get("role")
-    except jwt.ExpiredSignatureError:
-        raise HTTPException(status_code=401, detail="Token expired")
-    except jwt.PyJWTError:
-        raise HTTPException(status_code=401, detail="Invalid token")
-
-@router.get("/room-availability")
+@router.get("/room-availability", dependencies=[Depends(range_cpu_limit)])
 async def get_available_rooms(
-        db: AsyncSession = Depends(get_db),
+        db: AsyncSession = Depends(get_read_db),
         date: str = None,
+        start_date: str = None,
+        end_date: str = None,
         start_time: str = None,
         end_time: str = None,
+        granularity: int = 60,
 ):
+    """
+    Free time per room for a single `date` or a `start_date`..`end_date` range.
+    `granularity` (15, 30 or 60 minutes) controls the bookable slot size, and
+    `start_time`/`end_time` optionally narrow the window of the day.
+    """
     try:
-        if not date:
-            raise HTTPException(
-                status_code=400, detail="The 'date' query parameter is required."
-            )
-
-        booking_date = datetime.strptime(date, "%Y-%m-%d").date()
-
-        room_bookings_query = text("""
-            SELECT r.id AS room_id, 
-                   b.start_time AS booked_start_time, 
-                   b.end_time AS booked_end_time
-            FROM rooms r
-            LEFT JOIN bookings b 
-            ON r.id = b.room_id AND b.booking_date = :booking_date
-        """)
-
-        room_bookings_result = await db.execute(
-            room_bookings_query, {"booking_date": booking_date}
+        range_start, range_end, day_start, day_end = availability_window(
+            date, start_date, end_date, start_time, end_time, granularity
         )
-        room_bookings = room_bookings_result.fetchall()
-
-        # Process room availability
-        room_availability = {}
-        for row in room_bookings:
-            room_id = row[0]
-            if room_id not in room_availability:
-                room_availability[room_id] = {"booked_times": [], "available_times": []}
 
-            booked_start_time = row[1]
-            booked_end_time = row[2]
+        room_ids = await availability_cache.resource_ids(db)
+        intervals = await availability_cache.booked_intervals(db, room_ids, range_start, range_end)
 
-            if booked_start_time and booked_end_time:
-                room_availability[room_id]["booked_times"].append(
-                    (str(booked_start_time), str(booked_end_time))
-                )
-
-        # Compute available times
-        full_day_slots = [f"{str(h).zfill(2)}:00" for h in range(24)]
-        for room_id, room_data in room_availability.items():
-            booked_times = room_data["booked_times"]
+        availability = availability_from_intervals(
+            room_ids, intervals, range_start, range_end, granularity, day_start, day_end
+        )
 
-            room_data["available_times"] = [
-                time_slot for time_slot in full_day_slots if not any(
-                    booked_start <= time_slot < booked_end
-                    for booked_start, booked_end in booked_times
-                )
-            ]
+        # The result is already plain JSON data, so skip jsonable_encoder.
+        if date:
+            return ORJSONResponse({"room_availability": availability[range_start.isoformat()]})
 
-        return {"room_availability": jsonable_encoder(room_availability)}
+        return ORJSONResponse({
+            "start_date": range_start.isoformat(),
+            "end_date": range_end.isoformat(),
+            "granularity": granularity,
+            "room_availability": availability,
+        })
 
+    except HTTPException:
+        raise
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Dates must be YYYY-MM-DD and times HH:MM.")
     except Exception as e:
         await db.rollback()
         print(f"Error in /room-availability: {e}")
         raise HTTPException(status_code=500, detail="An error occurred.")
 
 
-@router.post("/book-room")
-async def book_room(booking: Booking, db: AsyncSession = Depends(get_db)):
+@router.get("/availability/stream")
+async def stream_availability(request: Request, date: str):
+    """
+    Push availability changes for one date as server-sent events, so the
+    room grid can update itself instead of polling /room-availability.
+    """
     try:
-        # Step 1: Check for conflicting bookings before creating a new one
-        conflict_query = text("""
-            SELECT 1 FROM bookings
-            WHERE room_id = :room_id
-              AND booking_date = :booking_date
-              AND (
-                  (:start_time BETWEEN start_time AND end_time) OR
-                  (:end_time BETWEEN start_time AND end_time) OR
-                  (start_time BETWEEN :start_time AND :end_time)
-              )
-        """)
-
-        # Execute the query and pass parameters to avoid SQL injection
-        result = await db.execute(conflict_query, {
-            "room_id": booking.room_id,
-            "booking_date": booking.booking_date,
-            "start_time": booking.start_time,
-            "end_time": booking.end_time,
-        })
+        day = datetime.strptime(date, "%Y-%m-%d").date().isoformat()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="date must be YYYY-MM-DD.")
+
+    return StreamingResponse(
+        sse_stream(request, day),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
-        # Try to fetch the result
-        conflicting_booking = result.scalar()  # Returns `1` if there is a conflict, otherwise `None`
 
-        if conflicting_booking:
-            raise HTTPException(
-                status_code=400,
-                detail="The room is already booked for the given date and time."
+@router.post("/book-room", dependencies=[Depends(booking_limit)])
+async def book_room(booking: Booking, db: AsyncSession = Depends(get_db)):
+    if booking.end_time <= booking.start_time:
+        raise HTTPException(status_code=400, detail="end_time must be after start_time.")
+
+    try:
+        # Hold the per-room/date lock from the conflict check through the commit,
+        # so two concurrent requests for the same slot cannot both pass the check.
+        async with lock_room_dates(db, [(booking.room_id, booking.booking_date)]):
+            # Step 1: Check for conflicting bookings before creating a new one
+            conflict = await queries.room_conflict(
+                db, booking.room_id, booking.booking_date, booking.start_time, booking.end_time
             )
 
-        # Step 2: If no conflict, proceed to create the booking
-        new_booking = BookingModel(
-            user_id=booking.user_id,
-            room_id=booking.room_id,
-            booking_date=booking.booking_date,
-            start_time=booking.start_time,
-            end_time=booking.end_time,
-            purpose=booking.purpose,
-        )
+            if conflict is not None:
+                raise HTTPException(
+                    status_code=400,
+                    detail="The room is already booked for the given date and time."
+                )
+
+            # Step 2: If no conflict, proceed to create the booking and commit
+            booking_id = await queries.insert_booking(db, **booking.model_dump())
+            await record_bookings(db, [
+                (booking.room_id, booking.booking_date, booking.start_time, booking.end_time)
+            ])
+            await bump_versions(db, user_bookings_scope(booking.user_id))
+            await db.commit()
 
-        # Add the new booking and commit the transaction
-        db.add(new_booking)
-        await db.commit()
-        await db.refresh(new_booking)  # Fetch the new booking data to access `id`
+        await availability_cache.invalidate([(booking.room_id, booking.booking_date)])
+        await publish_booked([(
+            booking_id, booking.room_id, booking.booking_date, booking.start_time, booking.end_time
+        )])
 
-        return {"message": "Booking successful.", "booking_id": new_booking.id}
+        return {"message": "Booking successful.", "booking_id": booking_id}
 
     except HTTPException as http_exc:
         # Explicitly handle HTTP exceptions
+        await db.rollback()
         raise http_exc
 
     except Exception as e:
@@ -230,28 +253,141 @@ async def book_room(booking: Booking, db: AsyncSession = Depends(get_db)):
         await db.rollback()  # Rollback any changes on failure
         raise HTTPException(status_code=500, detail="An error occurred while booking the room.")
 
-@router.get("/admin-bookings")
-async def get_admin_bookings(db: AsyncSession = Depends(get_db), user_role: str = Depends(get_user_role)):
+@router.post("/book-room/batch", dependencies=[Depends(booking_limit)])
+async def book_rooms_batch(batch: BatchBooking, db: AsyncSession = Depends(get_db)):
     """
-    Fetch all bookings for the current day.
+    Book many (room, date, time) slots at once, from an explicit list and/or a
+    recurrence rule. Conflicts are checked with one query and the accepted
+    items are inserted with one bulk statement. In "all_or_nothing" mode any
+    conflict rejects the whole batch; in "best_effort" mode the free items are
+    booked and the rest are reported.
     """
-    if user_role is None:
-        raise HTTPException(status_code=403, detail="User role missing in the token.")
-    if user_role != "admin":
-        raise HTTPException(status_code=403, detail="Unauthorized access")
+    items = batch_items(batch)
+    if not items:
+        raise HTTPException(status_code=400, detail="The batch contains no bookings.")
+    if len(items) > MAX_BATCH_ITEMS:
+        raise HTTPException(
+            status_code=400, detail=f"A batch may contain at most {MAX_BATCH_ITEMS} bookings."
+        )
+
+    keys = {(item.room_id, item.booking_date) for item in items}
 
     try:
-        today = date.today()
-        # Use select() for AsyncSession
-        result = await db.execute(
-            select(BookingModel).where(BookingModel.booking_date == today)
-        )
-        bookings = result.scalars().all()  # Get the list of results
+        async with lock_room_dates(db, keys):
+            statuses = find_conflicts(items, await queries.booked_slots(db, keys))
+
+            results = [
+                {"index": index, **item.model_dump(mode="json"), "status": item_status}
+                for index, (item, item_status) in enumerate(zip(items, statuses))
+            ]
+
+            accepted = [
+                (result, item) for result, item in zip(results, items) if result["status"] == "booked"
+            ]
+            if batch.mode == "all_or_nothing" and len(accepted) != len(items):
+                for result in results:
+                    if result["status"] == "booked":
+                        result["status"] = "not_booked"
+                raise HTTPException(
+                    status_code=409,
+                    detail={"message": "Some bookings conflict; nothing was booked.", "results": results},
+                )
+
+            if accepted:
+                booking_ids = await queries.insert_bookings(
+                    db,
+                    [
+                        {
+                            "user_id": batch.user_id,
+                            "room_id": item.room_id,
+                            "booking_date": item.booking_date,
+                            "start_time": item.start_time,
+                            "end_time": item.end_time,
+                            "purpose": batch.purpose,
+                        }
+                        for _, item in accepted
+                    ],
+                )
+                for (result, _), booking_id in zip(accepted, booking_ids):
+                    result["booking_id"] = booking_id
+                await record_bookings(db, [
+                    (item.room_id, item.booking_date, item.start_time, item.end_time) for _, item in accepted
+                ])
+                await bump_versions(db, user_bookings_scope(batch.user_id))
+                await db.commit()
+
+        if accepted:
+            await availability_cache.invalidate({(item.room_id, item.booking_date) for _, item in accepted})
+            await publish_booked(
+                (result["booking_id"], item.room_id, item.booking_date, item.start_time, item.end_time)
+                for result, item in accepted
+            )
+
+        return {
+            "message": f"{len(accepted)} of {len(items)} bookings created.",
+            "results": results,
+        }
+
+    except HTTPException as http_exc:
+        await db.rollback()
+        raise http_exc
+
+    except Exception as e:
+        print(f"Error in batch booking: {e}")
+        await db.rollback()
+        raise HTTPException(status_code=500, detail="An error occurred while booking the rooms.")
+
+def encode_booking_cursor(booking) -> str:
+    return f"{booking.booking_date.isoformat()}|{booking.start_time.isoformat()}|{booking.id}"
+
+
+def decode_booking_cursor(cursor: str):
+    booking_date, start_time, booking_id = cursor.split("|")
+    return date.fromisoformat(booking_date), time.fromisoformat(start_time), int(booking_id)
+
+
+@router.get("/admin-bookings", response_model=AdminBookingPage)
+async def get_admin_bookings(
+        user_role: str = Depends(require_admin),
+        db: AsyncSession = Depends(get_read_db),
+        from_date: Optional[date] = Query(None, alias="from", description="First day (default: today)"),
+        to_date: Optional[date] = Query(None, alias="to", description="Last day (default: from)"),
+        room_id: Optional[int] = None,
+        user_id: Optional[int] = None,
+        limit: int = Query(ADMIN_PAGE_SIZE, gt=0, le=MAX_ADMIN_PAGE_SIZE),
+        cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+):
+    """
+    Fetch bookings in a date range (today by default), optionally for one room
+    or user, ordered by date and start time and paginated by keyset. Each
+    booking comes with its user and room, loaded in the same query.
+    """
+    from_date = from_date or date.today()
+    to_date = to_date or from_date
+    if to_date < from_date:
+        raise HTTPException(status_code=400, detail="'to' must not be before 'from'.")
+
+    try:
+        after = decode_booking_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+
+    try:
+        # One extra row tells whether there is a next page.
+        bookings = await queries.admin_bookings(db, from_date, to_date, room_id, user_id, after, limit + 1)
+
+        next_cursor = None
+        if len(bookings) > limit:
+            bookings = bookings[:limit]
+            next_cursor = encode_booking_cursor(bookings[-1])
 
         if not bookings:
-            return {"message": "No bookings found for today", "bookings": []}
+            return AdminBookingPage(message="No bookings found for the selected period", bookings=[])
 
-        return {"bookings": jsonable_encoder(bookings)}
+        return AdminBookingPage(
+            bookings=[AdminBooking.model_validate(booking) for booking in bookings],
+            next_cursor=next_cursor,
+        )
     except Exception as e:
         print(f"Error fetching admin bookings: {e}")
         raise HTTPException(status_code=500, detail="An error occurred while retrieving bookings.")
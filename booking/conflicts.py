@@ -0,0 +1,92 @@
+import asyncio
+import hashlib
+import weakref
+from contextlib import asynccontextmanager
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+# Fallback locks for databases without advisory locks (SQLite in tests and
+# local development). They only serialize writers inside one process.
+_local_locks = weakref.WeakValueDictionary()
+
+
+def lock_key(kind: str, resource_id: int, day) -> int:
+    """Stable signed 64-bit key for a (kind, resource, date) lock."""
+    digest = hashlib.blake2b(f"{kind}:{resource_id}:{day}".encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+def overlaps(model, start_time, end_time):
+    """
+    Half-open interval overlap test: [start, end) clashes with an existing row
+    only if they share more than an endpoint, so back-to-back bookings are allowed.
+    """
+    return (model.start_time < end_time) & (model.end_time > start_time)
+
+
+async def overlapping_resources(db: AsyncSession, resource_column, date_column, resource_ids, day,
+                                start_time, end_time):
+    """
+    Ids among `resource_ids` that already have a row overlapping [start_time,
+    end_time) on `day`, in one query over the (resource, date, start) index.
+    """
+    result = await db.execute(
+        select(resource_column).distinct().where(
+            resource_column.in_(set(resource_ids)),
+            date_column == day,
+            overlaps(resource_column.class_, start_time, end_time),
+        )
+    )
+    return set(result.scalars().all())
+
+
+@asynccontextmanager
+async def lock_resources(db: AsyncSession, kind: str, keys):
+    """
+    Serialize conflict checks for the given (resource_id, date) keys.
+
+    On PostgreSQL this takes transaction-scoped advisory locks, which are
+    released by the commit or rollback that ends the booking transaction, so
+    the caller must commit inside the block. Elsewhere an in-process asyncio
+    lock per key is held for the duration of the block. Keys are locked in
+    sorted order so overlapping multi-key requests cannot deadlock.
+    """
+    ordered = sorted(set(keys))
+
+    if db.bind.dialect.name == "postgresql":
+        # One round-trip for any number of keys; unnest keeps the array order.
+        await db.execute(
+            text("SELECT pg_advisory_xact_lock(key) FROM unnest(CAST(:keys AS BIGINT[])) AS key"),
+            {"keys": [lock_key(kind, resource_id, day) for resource_id, day in ordered]},
+        )
+        yield
+        return
+
+    held = []
+    try:
+        for resource_id, day in ordered:
+            name = (kind, resource_id, day)
+            lock = _local_locks.get(name)
+            if lock is None:
+                lock = asyncio.Lock()
+                _local_locks[name] = lock
+            await lock.acquire()
+            held.append(lock)
+        yield
+    finally:
+        for lock in reversed(held):
+            lock.release()
+
+
+def lock_room_dates(db: AsyncSession, keys):
+    """Lock (room_id, booking_date) pairs for a booking transaction."""
+    return lock_resources(db, "room", keys)
+
+
+def lock_equipment_dates(db: AsyncSession, keys):
+    """
+    Lock (equipment_id, reservation_date) pairs. A transaction that needs both
+    takes its room locks first, so the two kinds cannot deadlock.
+    """
+    return lock_resources(db, "equipment", keys)
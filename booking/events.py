@@ -0,0 +1,157 @@
+import asyncio
+import json
+import os
+from contextlib import asynccontextmanager
+
+# AVAILABILITY_BROKER_URL=redis://host:6379/0 relays events between workers
+# (needs the optional `redis` package); otherwise events stay in this process.
+AVAILABILITY_BROKER_URL = os.getenv("AVAILABILITY_BROKER_URL")
+SUBSCRIBER_QUEUE_SIZE = int(os.getenv("AVAILABILITY_SUBSCRIBER_QUEUE_SIZE", "100"))
+HEARTBEAT_SECONDS = 15
+
+CHANNEL_PREFIX = "availability-events:"
+
+
+class Subscription:
+    """One connected client's queue of events for a date."""
+
+    def __init__(self):
+        self.queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        # Set when events had to be dropped; the client must then refetch.
+        self.overflowed = False
+
+    def push(self, event: dict):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+
+class InProcessBroker:
+    """Fans events out to the subscribers connected to this worker."""
+
+    def __init__(self):
+        self.subscribers = {}  # ISO date -> set of Subscription
+
+    def deliver(self, day: str, event: dict):
+        for subscription in self.subscribers.get(day, ()):
+            subscription.push(event)
+
+    async def publish(self, day: str, event: dict):
+        self.deliver(day, event)
+
+    @asynccontextmanager
+    async def subscribe(self, day: str):
+        subscription = Subscription()
+        self.subscribers.setdefault(day, set()).add(subscription)
+        try:
+            yield subscription
+        finally:
+            subscribers = self.subscribers.get(day)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self.subscribers[day]
+
+    def subscriber_count(self) -> int:
+        return sum(len(subscribers) for subscribers in self.subscribers.values())
+
+    async def close(self):
+        pass
+
+
+class RedisBroker(InProcessBroker):
+    """
+    Publishes through Redis pub/sub so every worker sees every booking. Each
+    worker runs one listener that hands incoming events to its local subscribers.
+    """
+
+    def __init__(self, url: str):
+        super().__init__()
+        import redis.asyncio as redis  # Optional dependency, only needed when configured
+
+        self.client = redis.from_url(url)
+        self.listener = None
+
+    async def publish(self, day: str, event: dict):
+        await self.client.publish(CHANNEL_PREFIX + day, json.dumps(event))
+
+    async def _listen(self):
+        pubsub = self.client.pubsub()
+        await pubsub.psubscribe(CHANNEL_PREFIX + "*")
+        async for message in pubsub.listen():
+            if message["type"] != "pmessage":
+                continue
+            channel = message["channel"]
+            if isinstance(channel, bytes):
+                channel = channel.decode("utf-8")
+            self.deliver(channel[len(CHANNEL_PREFIX):], json.loads(message["data"]))
+
+    @asynccontextmanager
+    async def subscribe(self, day: str):
+        if self.listener is None or self.listener.done():
+            self.listener = asyncio.create_task(self._listen())
+        async with super().subscribe(day) as subscription:
+            yield subscription
+
+    async def close(self):
+        if self.listener is not None:
+            self.listener.cancel()
+        await self.client.aclose()
+
+
+def make_broker():
+    if AVAILABILITY_BROKER_URL:
+        return RedisBroker(AVAILABILITY_BROKER_URL)
+    return InProcessBroker()
+
+
+availability_broker = make_broker()
+
+
+async def publish_booked(bookings):
+    """
+    Announce newly booked intervals. `bookings` holds (booking_id, room_id,
+    booking_date, start_time, end_time) tuples for committed rows.
+    """
+    try:
+        for booking_id, room_id, booking_date, start_time, end_time in bookings:
+            await availability_broker.publish(booking_date.isoformat(), {
+                "type": "booked",
+                "booking_id": booking_id,
+                "room_id": room_id,
+                "date": booking_date.isoformat(),
+                "start_time": start_time.strftime("%H:%M"),
+                "end_time": end_time.strftime("%H:%M"),
+            })
+    except Exception as e:
+        # The booking is already committed; clients fall back to refetching.
+        print(f"Error publishing availability event: {e}")
+
+
+def format_event(event_type: str, data: dict) -> str:
+    return f"event: {event_type}\ndata: {json.dumps(data)}\n\n"
+
+
+async def sse_stream(request, day: str):
+    """
+    Server-sent events for one date: a "ready" event, then one event per
+    booking, a "resync" event if this client fell too far behind (it should
+    refetch /api/room-availability), and comment heartbeats to keep proxies
+    from closing the idle connection.
+    """
+    async with availability_broker.subscribe(day) as subscription:
+        yield "retry: 5000\n" + format_event("ready", {"date": day})
+        while not await request.is_disconnected():
+            if subscription.overflowed:
+                while not subscription.queue.empty():
+                    subscription.queue.get_nowait()
+                subscription.overflowed = False
+                yield format_event("resync", {"date": day})
+                continue
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            yield format_event(event["type"], event)
@@ -0,0 +1,117 @@
+# Data access for the booking routes. Every hot statement is built once at
+# import time with bind parameters, so a request only binds values and hits
+# SQLAlchemy's compiled-statement cache instead of rebuilding the construct.
+# Read-only paths return slotted dataclasses rather than ORM instances; orjson
+# serializes them natively.
+from dataclasses import dataclass
+from datetime import date, time
+from typing import Optional
+from sqlalchemy import bindparam, insert, lambda_stmt, tuple_, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.orm import joinedload
+from database.models import Booking as BookingModel, BookingArchive
+from booking.conflicts import overlaps
+from booking.schemas import ARCHIVE_COLUMNS, BOOKING_COLUMNS
+
+
+@dataclass(slots=True)
+class BookingRow:
+    id: int
+    user_id: int
+    room_id: int
+    booking_date: date
+    start_time: time
+    end_time: time
+    purpose: str
+
+
+# A user's history spans the hot table and the archive (booking/archive.py).
+USER_BOOKINGS = union_all(
+    select(*BOOKING_COLUMNS).where(BookingModel.user_id == bindparam("user_id")),
+    select(*ARCHIVE_COLUMNS).where(BookingArchive.user_id == bindparam("user_id")),
+).order_by("booking_date", "start_time", "id")
+
+ROOM_CONFLICT = (
+    select(BookingModel.id)
+    .where(
+        BookingModel.room_id == bindparam("room_id"),
+        BookingModel.booking_date == bindparam("booking_date"),
+        overlaps(BookingModel, bindparam("start_time"), bindparam("end_time")),
+    )
+    .limit(1)
+)
+
+BOOKED_SLOTS = select(
+    BookingModel.room_id,
+    BookingModel.booking_date,
+    BookingModel.start_time,
+    BookingModel.end_time,
+).where(
+    BookingModel.room_id.in_(bindparam("room_ids", expanding=True)),
+    BookingModel.booking_date.in_(bindparam("booking_dates", expanding=True)),
+)
+
+INSERT_BOOKING = insert(BookingModel).returning(BookingModel.id, sort_by_parameter_order=True)
+
+
+async def user_bookings(db: AsyncSession, user_id: int):
+    result = await db.execute(USER_BOOKINGS, {"user_id": user_id})
+    return [BookingRow(*row) for row in result]
+
+
+async def room_conflict(db: AsyncSession, room_id: int, booking_date: date, start_time: time, end_time: time):
+    """Id of one booking overlapping the slot, or None when the room is free."""
+    result = await db.execute(ROOM_CONFLICT, {
+        "room_id": room_id,
+        "booking_date": booking_date,
+        "start_time": start_time,
+        "end_time": end_time,
+    })
+    return result.scalar()
+
+
+async def booked_slots(db: AsyncSession, keys):
+    """(room_id, booking_date, start_time, end_time) rows for the rooms and dates in `keys`."""
+    result = await db.execute(BOOKED_SLOTS, {
+        "room_ids": list({room_id for room_id, _ in keys}),
+        "booking_dates": list({booking_date for _, booking_date in keys}),
+    })
+    return result.all()
+
+
+async def insert_bookings(db: AsyncSession, rows):
+    """Insert booking value dicts in one statement; ids come back in input order."""
+    result = await db.execute(INSERT_BOOKING, rows)
+    return result.scalars().all()
+
+
+async def insert_booking(db: AsyncSession, **values):
+    return (await insert_bookings(db, [values]))[0]
+
+
+async def admin_bookings(db: AsyncSession, from_date: date, to_date: date, room_id: Optional[int],
+                         user_id: Optional[int], after, limit: int):
+    """
+    One keyset page of bookings with user and room joined in. The optional
+    filters are added as lambdas, so each combination is cached separately.
+    """
+    query = lambda_stmt(
+        lambda: select(BookingModel)
+        .options(joinedload(BookingModel.user), joinedload(BookingModel.room))
+        .where(BookingModel.booking_date.between(from_date, to_date))
+        .order_by(BookingModel.booking_date, BookingModel.start_time, BookingModel.id)
+        .limit(limit)
+    )
+    if room_id is not None:
+        query += lambda s: s.where(BookingModel.room_id == room_id)
+    if user_id is not None:
+        query += lambda s: s.where(BookingModel.user_id == user_id)
+    if after is not None:
+        after_date, after_time, after_id = after
+        query += lambda s: s.where(
+            tuple_(BookingModel.booking_date, BookingModel.start_time, BookingModel.id)
+            > tuple_(after_date, after_time, after_id)
+        )
+    result = await db.execute(query)
+    return result.scalars().all()
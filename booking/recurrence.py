@@ -0,0 +1,93 @@
+from datetime import date, time, timedelta
+from typing import Literal, Optional
+from pydantic import BaseModel, Field, model_validator
+
+MAX_BATCH_ITEMS = 500
+
+
+class BookingItem(BaseModel):
+    room_id: int
+    booking_date: date
+    start_time: time
+    end_time: time
+
+
+class RecurrenceRule(BaseModel):
+    room_ids: list[int] = Field(..., min_length=1)  # Every room is booked on every occurrence
+    start_date: date  # First occurrence
+    until: Optional[date] = None  # Last possible occurrence (inclusive)
+    count: Optional[int] = Field(None, gt=0)  # Number of occurrences per room
+    frequency: Literal["daily", "weekly"] = "weekly"
+    interval: int = Field(1, gt=0)  # Every `interval` days/weeks
+    start_time: time
+    end_time: time
+
+    @model_validator(mode="after")
+    def check_bounds(self):
+        if self.until is None and self.count is None:
+            raise ValueError("Either 'until' or 'count' is required.")
+        return self
+
+
+class BatchBooking(BaseModel):
+    user_id: int
+    purpose: str
+    items: list[BookingItem] = []
+    recurrence: Optional[RecurrenceRule] = None
+    mode: Literal["all_or_nothing", "best_effort"] = "all_or_nothing"
+
+
+def expand_recurrence(rule: RecurrenceRule):
+    """Expand a recurrence rule into one BookingItem per room and occurrence."""
+    step = timedelta(days=rule.interval * (7 if rule.frequency == "weekly" else 1))
+    items = []
+    current = rule.start_date
+    occurrences = 0
+    while (rule.until is None or current <= rule.until) and (rule.count is None or occurrences < rule.count):
+        for room_id in rule.room_ids:
+            items.append(BookingItem(
+                room_id=room_id,
+                booking_date=current,
+                start_time=rule.start_time,
+                end_time=rule.end_time,
+            ))
+        occurrences += 1
+        if len(items) > MAX_BATCH_ITEMS:
+            break
+        current += step
+    return items
+
+
+def batch_items(batch: BatchBooking):
+    """All requested items: the explicit list followed by the expanded rule."""
+    items = list(batch.items)
+    if batch.recurrence is not None:
+        items.extend(expand_recurrence(batch.recurrence))
+    return items
+
+
+def find_conflicts(items, existing):
+    """
+    Return one status per item: "booked" if it can be inserted, otherwise
+    "conflict" or "invalid".
+
+    `existing` holds (room_id, booking_date, start_time, end_time) rows already
+    in the database. Items accepted earlier in the same batch also count, so a
+    batch cannot double-book itself.
+    """
+    taken = {}
+    for room_id, booking_date, start_time, end_time in existing:
+        taken.setdefault((room_id, booking_date), []).append((start_time, end_time))
+
+    statuses = []
+    for item in items:
+        if item.end_time <= item.start_time:
+            statuses.append("invalid")
+            continue
+        slots = taken.setdefault((item.room_id, item.booking_date), [])
+        if any(start < item.end_time and end > item.start_time for start, end in slots):
+            statuses.append("conflict")
+            continue
+        slots.append((item.start_time, item.end_time))
+        statuses.append("booked")
+    return statuses
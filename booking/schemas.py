@@ -0,0 +1,58 @@
+from datetime import date, time
+from typing import Optional
+from pydantic import BaseModel, ConfigDict
+from database.models import Booking as BookingModel, BookingArchive
+
+# Columns selected for read-only booking lists, matching BookingOut.
+BOOKING_COLUMNS = (
+    BookingModel.id,
+    BookingModel.user_id,
+    BookingModel.room_id,
+    BookingModel.booking_date,
+    BookingModel.start_time,
+    BookingModel.end_time,
+    BookingModel.purpose,
+)
+ARCHIVE_COLUMNS = tuple(getattr(BookingArchive, column.key) for column in BOOKING_COLUMNS)
+
+
+class UserSummary(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    username: str
+
+
+class RoomSummary(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    name: str
+
+
+class BookingOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    user_id: Optional[int]
+    room_id: Optional[int]
+    booking_date: date
+    start_time: time
+    end_time: time
+    purpose: str
+
+
+class BookingList(BaseModel):
+    message: Optional[str] = None
+    bookings: list[BookingOut]
+
+
+class AdminBooking(BookingOut):
+    user: Optional[UserSummary]  # Loaded with the booking, no extra lookup needed
+    room: Optional[RoomSummary]
+
+
+class AdminBookingPage(BaseModel):
+    message: Optional[str] = None
+    bookings: list[AdminBooking]
+    next_cursor: Optional[str] = None  # Pass back as `cursor` to get the next page
@@ -1,9 +1,35 @@
+"""
+Schema management command, run once per deploy before the app starts:
+
+    python -m database.main upgrade   # apply pending migrations, add booking partitions, then seed
+    python -m database.main current   # print the applied schema version
+"""
+import argparse
 import asyncio
-from database import engine
-from database.models import Base
+from datetime import date
+from database import SessionLocal, get_engine
+from database.migrations import HEAD, current_version, upgrade
+from database.partitions import PARTITIONS_AHEAD, ensure_partitions
+from database.seed import seed
+
+
+async def run(command: str):
+    engine = get_engine()
+    if command == "current":
+        print(f"schema version {await current_version(engine)} (head {HEAD})")
+    else:
+        applied = await upgrade(engine)
+        print(f"applied migrations: {applied or 'none'}; schema at version {HEAD}")
+        async with engine.begin() as conn:
+            created = await conn.run_sync(ensure_partitions, date.today(), PARTITIONS_AHEAD)
+        if created:
+            print(f"created booking partitions: {', '.join(f'{month:%Y-%m}' for month in created)}")
+        async with SessionLocal() as session:
+            await seed(session)
+    await engine.dispose()
 
-async def init_db():
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
 
-asyncio.run(init_db())
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the database schema.")
+    parser.add_argument("command", nargs="?", default="upgrade", choices=["upgrade", "current"])
+    asyncio.run(run(parser.parse_args().command))
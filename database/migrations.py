@@ -0,0 +1,132 @@
+import datetime
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, select, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+from .models import Base
+from .partitions import PARTITIONS_AHEAD, partition_bookings
+
+# Bookkeeping table, kept out of Base.metadata so create_all never touches it.
+version_metadata = MetaData()
+schema_version = Table(
+    "schema_version",
+    version_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("description", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+# Arbitrary constant for the advisory lock that keeps concurrent upgrades apart.
+MIGRATION_LOCK_ID = 4_021_977
+
+
+def _create_tables(conn, *names):
+    Base.metadata.create_all(conn, tables=[Base.metadata.tables[name] for name in names])
+
+
+def _create_indexes(conn, table_name, *index_names):
+    table = Base.metadata.tables[table_name]
+    for index in table.indexes:
+        if index.name in index_names:
+            index.create(conn, checkfirst=True)
+
+
+def _baseline(conn):
+    # Tables as they existed before versioning; existing ones are left alone.
+    _create_tables(conn, "users", "rooms", "bookings", "equipment", "inventory")
+
+
+def _booking_and_inventory_indexes(conn):
+    _create_indexes(conn, "bookings", "ix_bookings_room_date_start")
+    _create_indexes(conn, "inventory", "ix_inventory_name_prefix", "ix_inventory_quantity")
+
+
+def _booking_date_index(conn):
+    _create_indexes(conn, "bookings", "ix_bookings_booking_date")
+
+
+def _equipment_reservations(conn):
+    _create_tables(conn, "equipment_reservations")
+
+
+def _data_versions(conn):
+    _create_tables(conn, "data_versions")
+
+
+def _room_utilization(conn):
+    _create_tables(conn, "room_utilization")
+
+
+def _booking_partitions(conn):
+    _create_tables(conn, "bookings_archive")
+    if conn.dialect.name == "postgresql":
+        # Recreates every bookings index, the new user history one included.
+        partition_bookings(conn, datetime.date.today(), PARTITIONS_AHEAD)
+    else:
+        _create_indexes(conn, "bookings", "ix_bookings_user_date")
+
+
+# (version, description, function run with a sync connection). Append only;
+# never edit a migration that has been deployed.
+MIGRATIONS = [
+    (1, "baseline schema", _baseline),
+    (2, "booking conflict and inventory filter indexes", _booking_and_inventory_indexes),
+    (3, "bookings booking_date index", _booking_date_index),
+    (4, "equipment reservations", _equipment_reservations),
+    (5, "data version counters for ETags", _data_versions),
+    (6, "room utilization rollups", _room_utilization),
+    (7, "monthly booking partitions and bookings archive", _booking_partitions),
+]
+
+HEAD = MIGRATIONS[-1][0]
+
+
+def _current_version(conn) -> int:
+    if not conn.dialect.has_table(conn, schema_version.name):
+        return 0
+    return conn.execute(select(schema_version.c.version).order_by(schema_version.c.version.desc())).scalar() or 0
+
+
+async def current_version(engine: AsyncEngine) -> int:
+    """Latest applied migration, or 0 for an unversioned database."""
+    async with engine.connect() as conn:
+        return await conn.run_sync(_current_version)
+
+
+async def upgrade(engine: AsyncEngine, target: int = HEAD):
+    """Apply pending migrations up to target, each in its own transaction."""
+    applied = []
+    async with engine.connect() as conn:
+        is_postgres = conn.dialect.name == "postgresql"
+        if is_postgres:
+            await conn.execute(text("SELECT pg_advisory_lock(:id)"), {"id": MIGRATION_LOCK_ID})
+            await conn.commit()
+        try:
+            await conn.run_sync(version_metadata.create_all)
+            await conn.commit()
+
+            current = await conn.run_sync(_current_version)
+            for version, description, migrate in MIGRATIONS:
+                if current < version <= target:
+                    await conn.run_sync(migrate)
+                    await conn.execute(schema_version.insert().values(
+                        version=version,
+                        description=description,
+                        applied_at=datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None),
+                    ))
+                    await conn.commit()
+                    applied.append(version)
+        finally:
+            if is_postgres:
+                await conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": MIGRATION_LOCK_ID})
+                await conn.commit()
+    return applied
+
+
+async def check_schema(engine: AsyncEngine):
+    """Fail fast when the database is behind the code."""
+    version = await current_version(engine)
+    if version < HEAD:
+        raise RuntimeError(
+            f"Database schema is at version {version}, code expects {HEAD}. "
+            "Run 'python -m database.main upgrade' first."
+        )
+    return version
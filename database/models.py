@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Date, Time, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, BigInteger, String, Date, Time, DateTime, ForeignKey, Boolean, Index, Table
 from sqlalchemy.orm import relationship
 from .database import Base
 
@@ -12,6 +12,9 @@ class User(Base):
     bookings = relationship("Booking", back_populates="user")
 
 class Booking(Base):
+    # Upcoming and recent bookings. On PostgreSQL the table is partitioned by
+    # month of booking_date (see database/partitions.py), so its real primary
+    # key there is (id, booking_date); ids still come from the one sequence.
     __tablename__ = 'bookings'
 
     id = Column(Integer, primary_key=True, index=True)
@@ -25,13 +28,65 @@ class Booking(Base):
     user = relationship("User", back_populates="bookings")
     room = relationship("Room", back_populates="bookings")  
 
+    __table_args__ = (
+        # Backs the per-room conflict check and availability lookups
+        Index("ix_bookings_room_date_start", "room_id", "booking_date", "start_time"),
+        # Date-range scans across all rooms (admin feed)
+        Index("ix_bookings_booking_date", "booking_date", "start_time"),
+        # A user's booking history
+        Index("ix_bookings_user_date", "user_id", "booking_date"),
+    )
+
+class BookingArchive(Base):
+    # Bookings moved out of `bookings` once they are older than the retention
+    # window (python -m booking.archive). Rows keep their original id.
+    __tablename__ = 'bookings_archive'
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    user_id = Column(Integer, ForeignKey('users.id'))
+    room_id = Column(Integer, ForeignKey('rooms.id'))
+    booking_date = Column(Date, nullable=False)
+    start_time = Column(Time, nullable=False)
+    end_time = Column(Time, nullable=False)
+    purpose = Column(String, nullable=False)
+
+    __table_args__ = (
+        Index("ix_bookings_archive_user_date", "user_id", "booking_date"),
+        Index("ix_bookings_archive_room_date", "room_id", "booking_date"),
+    )
+
 class Equipment(Base):
     __tablename__ = 'equipment'
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, unique=True, index=True)
     description = Column(String)
-    status = Column(String) 
+    status = Column(String)  # "available" (or unset) means reservable; anything else, e.g. "maintenance", does not
+    reservations = relationship("EquipmentReservation", back_populates="equipment")
+
+class EquipmentReservation(Base):
+    __tablename__ = 'equipment_reservations'
+
+    id = Column(Integer, primary_key=True, index=True)
+    equipment_id = Column(Integer, ForeignKey('equipment.id'), nullable=False)
+    user_id = Column(Integer, ForeignKey('users.id'))
+    # Room booking made in the same request, if any. Not a foreign key: the
+    # booking may be partitioned on PostgreSQL or moved to bookings_archive.
+    booking_id = Column(Integer)
+    reservation_date = Column(Date, nullable=False)
+    start_time = Column(Time, nullable=False)
+    end_time = Column(Time, nullable=False)
+    purpose = Column(String, nullable=False)
+    checked_out_at = Column(DateTime)
+    checked_in_at = Column(DateTime)
+
+    equipment = relationship("Equipment", back_populates="reservations")
+
+    __table_args__ = (
+        # Same shape as the bookings index: conflict checks and per-date availability
+        Index("ix_equipment_reservations_item_date_start", "equipment_id", "reservation_date", "start_time"),
+        Index("ix_equipment_reservations_date", "reservation_date", "start_time"),
+    )
 
 class Inventory(Base):
     __tablename__ = 'inventory'
@@ -41,6 +96,12 @@ class Inventory(Base):
     quantity = Column(Integer, nullable=False)
     unit = Column(String, nullable=False) 
 
+    __table_args__ = (
+        # Name-prefix search (LIKE 'abc%') and low-stock filtering
+        Index("ix_inventory_name_prefix", "name", postgresql_ops={"name": "text_pattern_ops"}),
+        Index("ix_inventory_quantity", "quantity"),
+    )
+
     def to_dict(self):
         return {
             "id": self.id,
@@ -56,3 +117,27 @@ class Room(Base):
     name = Column(String, nullable=False, unique=True)  # Room name (e.g., Room A, Room B)
     available = Column(Boolean, default=True)  # Field to track global availability
     bookings = relationship("Booking", back_populates="room")  # Relationship with Booking
+
+class DataVersion(Base):
+    __tablename__ = 'data_versions'
+
+    scope = Column(String, primary_key=True)  # e.g. "inventory" or "user-bookings:42"
+    version = Column(BigInteger, nullable=False, default=0)  # Bumped by every write to the scope
+
+class RoomUtilization(Base):
+    # Booking totals per room and day, and per room and month, kept current by
+    # the booking writes. One integer column per hour of the day holds the
+    # booked minutes in that hour, so every counter is updated with a plain
+    # atomic `column = column + n` upsert.
+    __table__ = Table(
+        'room_utilization',
+        Base.metadata,
+        Column('room_id', Integer, ForeignKey('rooms.id'), primary_key=True),
+        Column('period', String, primary_key=True),  # "day" or "month"
+        Column('period_start', Date, primary_key=True),  # The day, or the first of the month
+        Column('booked_minutes', Integer, nullable=False, default=0),
+        Column('booking_count', Integer, nullable=False, default=0),
+        *(Column(f'hour_{hour:02d}', Integer, nullable=False, default=0) for hour in range(24)),
+        # Range scans across all rooms
+        Index('ix_room_utilization_period_start', 'period', 'period_start'),
+    )
@@ -0,0 +1,211 @@
+"""
+Date-range storage for bookings.
+
+On PostgreSQL `bookings` is declaratively partitioned by month of
+booking_date: one `bookings_pYYYY_MM` partition per month plus a default
+partition for dates without one, so queries filtered on booking_date (the
+conflict check, availability, the admin feed) only scan the months they
+name. On every dialect, months older than the retention window are moved
+into `bookings_archive`; on PostgreSQL that drops whole partitions instead
+of deleting rows one by one.
+
+Everything here runs on a sync connection, like the migrations.
+"""
+import os
+from datetime import date, timedelta
+from sqlalchemy import delete, func, insert, text
+from sqlalchemy.future import select
+from .models import Base
+
+BOOKINGS = "bookings"
+ARCHIVE = "bookings_archive"
+DEFAULT_PARTITION = "bookings_default"
+PARTITION_PREFIX = "bookings_p"
+COLUMNS = "id, user_id, room_id, booking_date, start_time, end_time, purpose"
+
+# Months of partitions kept ready past the current one; bookings further out
+# land in the default partition until theirs is created.
+PARTITIONS_AHEAD = int(os.getenv("BOOKING_PARTITIONS_AHEAD", "12"))
+
+# Advisory lock keeping a deploy's upgrade and a scheduled archive run from
+# creating the same partition at once.
+PARTITION_LOCK_ID = 4_021_978
+
+# The primary key has to include the partition key; ids stay unique because
+# they all come from the one sequence.
+PARTITIONED_BOOKINGS = """
+CREATE TABLE bookings (
+    id INTEGER NOT NULL DEFAULT nextval('{sequence}'::regclass),
+    user_id INTEGER REFERENCES users (id),
+    room_id INTEGER REFERENCES rooms (id),
+    booking_date DATE NOT NULL,
+    start_time TIME WITHOUT TIME ZONE NOT NULL,
+    end_time TIME WITHOUT TIME ZONE NOT NULL,
+    purpose VARCHAR NOT NULL,
+    PRIMARY KEY (id, booking_date)
+) PARTITION BY RANGE (booking_date)
+"""
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def next_month(day: date) -> date:
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARTITION_PREFIX}{month:%Y_%m}"
+
+
+def is_partitioned(conn) -> bool:
+    if conn.dialect.name != "postgresql":
+        return False
+    return bool(conn.execute(text(
+        "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:name)"
+    ), {"name": BOOKINGS}).scalar())
+
+
+def partition_months(conn):
+    """First days of the months that have a partition of their own, oldest first."""
+    names = conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass(:name)"
+    ), {"name": BOOKINGS}).scalars()
+    return sorted(
+        date(int(name[-7:-3]), int(name[-2:]), 1)
+        for name in names if name.startswith(PARTITION_PREFIX)
+    )
+
+
+def create_partition(conn, month: date):
+    """
+    Add the partition for one month. Rows of that month already sitting in
+    the default partition are moved into it first, since PostgreSQL refuses
+    to attach a range the default partition still holds rows for.
+    """
+    name, lower, upper = partition_name(month), month.isoformat(), next_month(month).isoformat()
+    conn.execute(text(f"CREATE TABLE {name} (LIKE {BOOKINGS} INCLUDING DEFAULTS)"))
+    conn.execute(text(
+        f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+        f"WHERE booking_date >= :lower AND booking_date < :upper RETURNING {COLUMNS}) "
+        f"INSERT INTO {name} ({COLUMNS}) SELECT {COLUMNS} FROM moved"
+    ), {"lower": month, "upper": next_month(month)})
+    # Attaching clones the parent's indexes and foreign keys onto the partition.
+    conn.execute(text(f"ALTER TABLE {BOOKINGS} ATTACH PARTITION {name} FOR VALUES FROM ('{lower}') TO ('{upper}')"))
+
+
+def ensure_partitions(conn, today: date, months_ahead: int):
+    """Create any missing partitions from this month through `months_ahead` months ahead."""
+    if not is_partitioned(conn):
+        return []
+    conn.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": PARTITION_LOCK_ID})
+    existing = set(partition_months(conn))
+    created = []
+    month = month_start(today)
+    for _ in range(months_ahead + 1):
+        if month not in existing:
+            create_partition(conn, month)
+            created.append(month)
+        month = next_month(month)
+    return created
+
+
+def partition_bookings(conn, today: date, months_ahead: int):
+    """
+    Rebuild the plain PostgreSQL bookings table as a partitioned one, with a
+    partition for every month from the oldest booking through `months_ahead`
+    months ahead. Ids, the id sequence and every index are kept.
+    """
+    if conn.dialect.name != "postgresql" or is_partitioned(conn):
+        return
+    indexes = Base.metadata.tables[BOOKINGS].indexes
+    sequence = conn.execute(text("SELECT pg_get_serial_sequence(:table, 'id')"), {"table": BOOKINGS}).scalar()
+
+    # Equipment reservations pointed at bookings.id, which stops being unique
+    # on its own; see EquipmentReservation.booking_id.
+    conn.execute(text(
+        "ALTER TABLE equipment_reservations DROP CONSTRAINT IF EXISTS equipment_reservations_booking_id_fkey"
+    ))
+    for index in indexes:
+        conn.execute(text(f"DROP INDEX IF EXISTS {index.name}"))
+    conn.execute(text(f"ALTER TABLE {BOOKINGS} RENAME TO bookings_unpartitioned"))
+    # Free the primary and foreign key names for the new table.
+    constraints = conn.execute(text(
+        "SELECT conname FROM pg_constraint WHERE conrelid = 'bookings_unpartitioned'::regclass"
+    )).scalars().all()
+    for name in constraints:
+        conn.execute(text(f"ALTER TABLE bookings_unpartitioned RENAME CONSTRAINT {name} TO {name}_unpartitioned"))
+
+    conn.execute(text(PARTITIONED_BOOKINGS.format(sequence=sequence)))
+    conn.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY {BOOKINGS}.id"))
+    conn.execute(text(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {BOOKINGS} DEFAULT"))
+    oldest = conn.execute(text("SELECT min(booking_date) FROM bookings_unpartitioned")).scalar()
+    last = month_start(today)
+    for _ in range(months_ahead):
+        last = next_month(last)
+    month = month_start(min(oldest or today, today))
+    while month <= last:
+        create_partition(conn, month)
+        month = next_month(month)
+
+    conn.execute(text(f"INSERT INTO {BOOKINGS} ({COLUMNS}) SELECT {COLUMNS} FROM bookings_unpartitioned"))
+    conn.execute(text("DROP TABLE bookings_unpartitioned"))
+    # Indexes on the parent cascade to every partition, present and future.
+    for index in indexes:
+        index.create(conn)
+
+
+def archivable_months(conn, cutoff: date):
+    """Months before `cutoff` that still have bookings or a partition, oldest first."""
+    bookings = Base.metadata.tables[BOOKINGS]
+    oldest = conn.execute(
+        select(func.min(bookings.c.booking_date)).where(bookings.c.booking_date < cutoff)
+    ).scalar()
+    starts = [month for month in partition_months(conn) if month < cutoff] if is_partitioned(conn) else []
+    if oldest is not None:
+        starts.append(month_start(oldest))
+    if not starts:
+        return []
+    months = []
+    month = min(starts)
+    while month < cutoff:
+        months.append(month)
+        month = next_month(month)
+    return months
+
+
+def archive_month(conn, month: date) -> int:
+    """
+    Move one month of bookings into bookings_archive; the caller commits.
+    Returns the number of bookings moved.
+    """
+    moved = 0
+    if is_partitioned(conn) and month in partition_months(conn):
+        name = partition_name(month)
+        # Blocks writes to the month, not reads, until the partition is gone.
+        conn.execute(text(f"LOCK TABLE {name} IN EXCLUSIVE MODE"))
+        moved += conn.execute(text(f"INSERT INTO {ARCHIVE} ({COLUMNS}) SELECT {COLUMNS} FROM {name}")).rowcount
+        conn.execute(text(f"DROP TABLE {name}"))
+
+    # Rows without a partition of their own: the default partition on
+    # PostgreSQL, every row on SQLite.
+    bounds = {"lower": month, "upper": next_month(month)}
+    if conn.dialect.name == "postgresql":
+        moved += conn.execute(text(
+            f"WITH moved AS (DELETE FROM {BOOKINGS} "
+            f"WHERE booking_date >= :lower AND booking_date < :upper RETURNING {COLUMNS}) "
+            f"INSERT INTO {ARCHIVE} ({COLUMNS}) SELECT {COLUMNS} FROM moved"
+        ), bounds).rowcount
+    else:
+        # SQLite holds the write lock from the INSERT to the commit, so no
+        # booking can land between the copy and the delete.
+        bookings, archive = Base.metadata.tables[BOOKINGS], Base.metadata.tables[ARCHIVE]
+        in_month = (bookings.c.booking_date >= bounds["lower"]) & (bookings.c.booking_date < bounds["upper"])
+        moved += conn.execute(insert(archive).from_select(
+            [column.name for column in bookings.c],
+            select(*bookings.c).where(in_month),
+        )).rowcount
+        conn.execute(delete(bookings).where(in_month))
+    return moved
@@ -0,0 +1,200 @@
+"""
+Read replicas for the read-only routes.
+
+DATABASE_REPLICA_URLS       comma-separated replica URLs; unset means every
+                            query goes to DATABASE_URL as before
+REPLICA_PIN_SECONDS         after a request commits a write, that client's
+                            reads stay on the primary this long (5), so it
+                            reads its own writes despite replication lag; the
+                            client is recognised by its address (as the rate
+                            limits see it) or by its bearer token
+REPLICA_PIN_URL             redis://host:6379/0 to share those pins between
+                            workers (needs the optional `redis` package);
+                            otherwise each worker keeps its own
+REPLICA_CHECK_INTERVAL      seconds between replica health checks (5)
+REPLICA_CHECK_TIMEOUT       seconds a health check may take (2)
+
+Routes declaring get_read_db get a session on the next healthy replica in
+turn. A replica that fails its health check, or fails a query with a
+connection error, is skipped until a later check succeeds; the failed query
+is retried on the primary. With no healthy replica, reads use the primary.
+"""
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from fastapi import Request
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError
+from auth.ratelimit import client_ip
+
+logger = logging.getLogger(__name__)
+
+
+class InMemoryPins:
+    """Pin expiry times local to one worker, bounded to the most recent keys."""
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self.expires = OrderedDict()  # key -> monotonic expiry
+
+    async def pin(self, keys, seconds: float):
+        for key in keys:
+            self.expires[key] = time.monotonic() + seconds
+            self.expires.move_to_end(key)
+        while len(self.expires) > self.max_keys:
+            self.expires.popitem(last=False)
+
+    async def is_pinned(self, keys) -> bool:
+        """Whether any of the keys is pinned."""
+        pinned = False
+        for key in keys:
+            expires_at = self.expires.get(key)
+            if expires_at is None:
+                continue
+            if expires_at <= time.monotonic():
+                del self.expires[key]
+            else:
+                pinned = True
+        return pinned
+
+
+class RedisPins:
+    """Pins shared through a Redis-compatible server, expiring on their own."""
+
+    def __init__(self, url: str):
+        import redis.asyncio as redis  # Optional dependency, only needed when configured
+
+        self.client = redis.from_url(url)
+
+    async def pin(self, keys, seconds: float):
+        async with self.client.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.set(f"replica-pin:{key}", 1, px=max(1, int(seconds * 1000)))
+            await pipe.execute()
+
+    async def is_pinned(self, keys) -> bool:
+        """Whether any of the keys is pinned."""
+        return bool(await self.client.exists(*(f"replica-pin:{key}" for key in keys)))
+
+
+def is_connection_error(error: BaseException) -> bool:
+    """Errors that say the server is unreachable, not that the query is wrong."""
+    if isinstance(error, DBAPIError):
+        return error.connection_invalidated or isinstance(error, (OperationalError, InterfaceError))
+    return isinstance(error, (OSError, asyncio.TimeoutError))
+
+
+def pin_keys(request: Request):
+    """
+    The keys a client is pinned under: its address, which its anonymous and
+    authenticated requests share (POST /api/book-room carries no token), and
+    its token when it sends one, which survives a change of address. Writes
+    pin every key and reads check every key. Hashed so no credentials end up
+    in the pin store.
+    """
+    sources = [f"ip:{client_ip(request)}"]
+    if request.headers.get("authorization"):
+        sources.append(f"token:{request.headers['authorization']}")
+    return [hashlib.blake2b(source.encode("utf-8"), digest_size=12).hexdigest() for source in sources]
+
+
+class Replica:
+    def __init__(self, label: str, engine):
+        self.label = label
+        self.engine = engine
+        self.healthy = True
+        self.reads = 0
+        self.failures = 0
+
+    def mark_down(self, error: BaseException):
+        self.failures += 1
+        if self.healthy:
+            logger.warning("Read replica %s is unavailable, reading from the primary: %s", self.label, error)
+        self.healthy = False
+
+
+class ReplicaSet:
+    """Round-robin choice of a healthy replica per read-only request."""
+
+    def __init__(self, pins, pin_seconds: float, check_interval: float, check_timeout: float):
+        self.replicas = []  # Filled by configure() once the engines exist
+        self.pins = pins
+        self.pin_seconds = pin_seconds
+        self.check_interval = check_interval
+        self.check_timeout = check_timeout
+        self.primary_reads = {"pinned": 0, "failover": 0}
+        self._next = 0
+        self._checker = None
+
+    def configure(self, engines):
+        self.replicas = [Replica(str(index), engine) for index, engine in enumerate(engines)]
+
+    async def pin(self, request: Request):
+        """Keep this client's reads on the primary for the next pin_seconds."""
+        if self.replicas:
+            await self.pins.pin(pin_keys(request), self.pin_seconds)
+
+    async def choose(self, request: Request):
+        """The replica to read from, or None for the primary."""
+        if not self.replicas:
+            return None
+        if await self.pins.is_pinned(pin_keys(request)):
+            self.primary_reads["pinned"] += 1
+            return None
+        for _ in range(len(self.replicas)):
+            replica = self.replicas[self._next]
+            self._next = (self._next + 1) % len(self.replicas)
+            if replica.healthy:
+                replica.reads += 1
+                return replica
+        self.primary_reads["failover"] += 1
+        return None
+
+    async def _ping(self, replica: Replica):
+        async with replica.engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    async def check(self, replica: Replica):
+        try:
+            await asyncio.wait_for(self._ping(replica), self.check_timeout)
+        except Exception as error:
+            replica.mark_down(error)
+        else:
+            if not replica.healthy:
+                logger.info("Read replica %s is back", replica.label)
+            replica.healthy = True
+
+    async def _check_forever(self):
+        while True:
+            await asyncio.gather(*(self.check(replica) for replica in self.replicas))
+            await asyncio.sleep(self.check_interval)
+
+    def start(self):
+        """Start the health checks; called from the app lifespan."""
+        if self.replicas and self._checker is None:
+            self._checker = asyncio.create_task(self._check_forever())
+
+    async def close(self):
+        if self._checker is not None:
+            self._checker.cancel()
+            try:
+                await self._checker
+            except asyncio.CancelledError:
+                pass
+            self._checker = None
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+    def stats(self):
+        stats = {}
+        for replica in self.replicas:
+            labels = f'{{replica="{replica.label}"}}'
+            stats[f"db_replica_healthy{labels}"] = int(replica.healthy)
+            stats[f"db_replica_reads_total{labels}"] = replica.reads
+            stats[f"db_replica_failures_total{labels}"] = replica.failures
+        if self.replicas:
+            for reason, count in self.primary_reads.items():
+                stats[f'db_primary_reads_total{{reason="{reason}"}}'] = count
+        return stats
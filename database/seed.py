@@ -0,0 +1,41 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from .models import Room, User
+
+# bcrypt (cost 12) hashes of the default passwords, computed ahead of time so
+# startup does not spend CPU on them. Logins rehash them if BCRYPT_ROUNDS differs.
+DEFAULT_USERS = [
+    ("admin", "$2b$12$PfRvfGhb11uFlUa4x1QP0eAFPMgHov3YquzMeIVmMmi0lkI1E5Gp6", "admin"),  # adminpass
+    ("user", "$2b$12$v2I/e.0WH4sTV1EhZbGsWOKWmrHJH9z6OkFE6EplHbS1.UBnj6Hzm", "user"),  # userpass
+]
+
+DEFAULT_ROOMS = ["Room A", "Room B", "Room C"]
+
+
+async def add_default_users(db: AsyncSession):
+    # Only add the default accounts that are missing
+    existing = await db.execute(
+        select(User.username).where(User.username.in_([username for username, _, _ in DEFAULT_USERS]))
+    )
+    existing_usernames = set(existing.scalars().all())
+
+    db.add_all(
+        User(username=username, password_hash=password_hash, role=role)
+        for username, password_hash, role in DEFAULT_USERS
+        if username not in existing_usernames
+    )
+    await db.commit()
+
+
+async def seed_rooms(db: AsyncSession):
+    # Only seed rooms into an empty table, so renamed or removed rooms stay that way
+    existing_room = await db.execute(select(Room.id).limit(1))
+    if existing_room.scalar() is None:
+        db.add_all(Room(name=name) for name in DEFAULT_ROOMS)
+        await db.commit()
+
+
+async def seed(db: AsyncSession):
+    """Idempotently insert the default users and rooms."""
+    await add_default_users(db)
+    await seed_rooms(db)
@@ -0,0 +1,64 @@
+import hashlib
+from fastapi import Request, Response
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from .database import upsert_insert
+from .models import DataVersion
+
+# Change counters behind the ETags of frequently re-read lists. Writers bump
+# the scope in the same transaction as the change, readers compare one
+# primary-key lookup against If-None-Match before touching the data.
+INVENTORY_SCOPE = "inventory"
+
+
+def user_bookings_scope(user_id: int) -> str:
+    return f"user-bookings:{user_id}"
+
+
+async def get_version(db: AsyncSession, scope: str) -> int:
+    result = await db.execute(select(DataVersion.version).where(DataVersion.scope == scope))
+    return result.scalar() or 0
+
+
+async def bump_versions(db: AsyncSession, *scopes: str):
+    """Increment the counters for `scopes`; the caller commits with its write."""
+    scopes = sorted(set(scopes))  # Fixed order, so concurrent bumps cannot deadlock
+    insert = upsert_insert(db.bind.dialect.name)
+    if insert is not None:
+        statement = insert(DataVersion).values([{"scope": scope, "version": 1} for scope in scopes])
+        await db.execute(statement.on_conflict_do_update(
+            index_elements=[DataVersion.scope],
+            set_={"version": DataVersion.version + 1},
+        ))
+        return
+
+    result = await db.execute(
+        update(DataVersion)
+        .where(DataVersion.scope.in_(scopes))
+        .values(version=DataVersion.version + 1)
+        .returning(DataVersion.scope)
+    )
+    existing = set(result.scalars().all())
+    db.add_all(DataVersion(scope=scope, version=1) for scope in scopes if scope not in existing)
+    await db.flush()
+
+
+def make_etag(*parts) -> str:
+    """Strong ETag from the version marker plus whatever else selects the representation."""
+    digest = hashlib.blake2b("|".join(str(part) for part in parts).encode("utf-8"), digest_size=12)
+    return f'"{digest.hexdigest()}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison, so a W/ prefix still matches.
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+
+def not_modified(etag: str, cache_control: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
@@ -0,0 +1,372 @@
+import datetime as dt
+from datetime import date, time
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, ConfigDict, Field
+from sqlalchemy import insert, or_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from database.database import get_db, get_read_db
+from database.versions import bump_versions, user_bookings_scope
+from database.models import Equipment, EquipmentReservation
+from auth.tokens import require_admin
+from auth.ratelimit import booking_limit
+from analytics.rollups import record_bookings
+from booking import queries
+from booking.availability import availability_from_intervals
+from booking.availability_cache import AvailabilityCache, availability_cache, make_backend
+from booking.booking import Booking, availability_window, range_cpu_limit
+from booking.conflicts import lock_equipment_dates, lock_room_dates, overlapping_resources
+from booking.events import publish_booked
+
+router = APIRouter()
+
+MAX_ITEMS_PER_RESERVATION = 50
+
+RESERVABLE = or_(Equipment.status.is_(None), Equipment.status == "available")
+
+# Booked intervals per (date, equipment item), the same structure the room
+# availability uses; only reservable equipment is listed.
+equipment_availability_cache = AvailabilityCache(
+    make_backend(),
+    "equipment",
+    select(Equipment.id).where(RESERVABLE).order_by(Equipment.id),
+    (
+        EquipmentReservation.equipment_id,
+        EquipmentReservation.reservation_date,
+        EquipmentReservation.start_time,
+        EquipmentReservation.end_time,
+    ),
+)
+
+
+class EquipmentCreate(BaseModel):
+    name: str
+    description: Optional[str] = None
+    status: str = "available"
+
+
+class EquipmentUpdate(BaseModel):
+    description: Optional[str] = None
+    status: Optional[str] = None
+
+
+class EquipmentOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    name: str
+    description: Optional[str] = None
+    status: Optional[str] = None
+
+
+class EquipmentReservationRequest(BaseModel):
+    user_id: int
+    equipment_ids: list[int] = Field(..., min_length=1, max_length=MAX_ITEMS_PER_RESERVATION)
+    reservation_date: date
+    start_time: time
+    end_time: time
+    purpose: str
+
+
+class RoomWithEquipment(Booking):
+    equipment_ids: list[int] = Field(..., min_length=1, max_length=MAX_ITEMS_PER_RESERVATION)
+
+
+class ReservationOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    equipment_id: int
+    user_id: Optional[int] = None
+    booking_id: Optional[int] = None
+    reservation_date: date
+    start_time: time
+    end_time: time
+    purpose: str
+    checked_out_at: Optional[dt.datetime] = None
+    checked_in_at: Optional[dt.datetime] = None
+
+
+def utcnow():
+    return dt.datetime.now(dt.timezone.utc).replace(tzinfo=None)
+
+
+async def check_reservable(db: AsyncSession, equipment_ids):
+    """Raise 404 for unknown equipment and 409 for items that are out of service."""
+    result = await db.execute(select(Equipment.id, Equipment.status).where(Equipment.id.in_(equipment_ids)))
+    statuses = dict(result.all())
+    missing = sorted(set(equipment_ids) - statuses.keys())
+    if missing:
+        raise HTTPException(status_code=404, detail={"message": "Equipment not found.", "equipment_ids": missing})
+    unavailable = sorted(
+        equipment_id for equipment_id, status in statuses.items() if status not in (None, "available")
+    )
+    if unavailable:
+        raise HTTPException(
+            status_code=409, detail={"message": "Equipment is out of service.", "equipment_ids": unavailable}
+        )
+
+
+async def insert_reservations(db: AsyncSession, request, equipment_ids, reservation_date, booking_id=None):
+    """Conflict-check and insert one reservation per item; the caller holds the locks and commits."""
+    taken = await overlapping_resources(
+        db,
+        EquipmentReservation.equipment_id,
+        EquipmentReservation.reservation_date,
+        equipment_ids,
+        reservation_date,
+        request.start_time,
+        request.end_time,
+    )
+    if taken:
+        raise HTTPException(
+            status_code=409,
+            detail={"message": "Some equipment is already reserved for that time.", "equipment_ids": sorted(taken)},
+        )
+
+    inserted = await db.execute(
+        insert(EquipmentReservation).returning(EquipmentReservation.id, sort_by_parameter_order=True),
+        [
+            {
+                "equipment_id": equipment_id,
+                "user_id": request.user_id,
+                "booking_id": booking_id,
+                "reservation_date": reservation_date,
+                "start_time": request.start_time,
+                "end_time": request.end_time,
+                "purpose": request.purpose,
+            }
+            for equipment_id in equipment_ids
+        ],
+    )
+    return dict(zip(equipment_ids, inserted.scalars().all()))
+
+
+@router.get("", response_model=list[EquipmentOut])
+async def list_equipment(db: AsyncSession = Depends(get_read_db)):
+    result = await db.execute(select(Equipment).order_by(Equipment.id))
+    return result.scalars().all()
+
+
+@router.post("", response_model=EquipmentOut)
+async def create_equipment(
+        item: EquipmentCreate,
+        db: AsyncSession = Depends(get_db),
+        user_role: str = Depends(require_admin),
+):
+    equipment = Equipment(name=item.name, description=item.description, status=item.status)
+    db.add(equipment)
+    try:
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        print(f"Error creating equipment: {e}")
+        raise HTTPException(status_code=400, detail="Equipment with this name already exists.")
+    await equipment_availability_cache.invalidate_resources()
+    return equipment
+
+
+@router.patch("/{equipment_id}", response_model=EquipmentOut)
+async def update_equipment(
+        equipment_id: int,
+        item: EquipmentUpdate,
+        db: AsyncSession = Depends(get_db),
+        user_role: str = Depends(require_admin),
+):
+    """Change the description or status, e.g. take an item out for "maintenance"."""
+    equipment = await db.get(Equipment, equipment_id)
+    if equipment is None:
+        raise HTTPException(status_code=404, detail="Equipment not found.")
+    for field, value in item.model_dump(exclude_unset=True).items():
+        setattr(equipment, field, value)
+    await db.commit()
+    await equipment_availability_cache.invalidate_resources()
+    return equipment
+
+
+@router.get("/availability", dependencies=[Depends(range_cpu_limit)])
+async def get_equipment_availability(
+        db: AsyncSession = Depends(get_read_db),
+        date: str = None,
+        start_date: str = None,
+        end_date: str = None,
+        start_time: str = None,
+        end_time: str = None,
+        granularity: int = 60,
+):
+    """
+    Free time per reservable equipment item, with the same parameters and
+    response shape as /api/room-availability. Intervals are loaded with one
+    query per request for all items and dates, then cached per (date, item).
+    """
+    try:
+        range_start, range_end, day_start, day_end = availability_window(
+            date, start_date, end_date, start_time, end_time, granularity
+        )
+
+        equipment_ids = await equipment_availability_cache.resource_ids(db)
+        intervals = await equipment_availability_cache.booked_intervals(db, equipment_ids, range_start, range_end)
+
+        availability = availability_from_intervals(
+            equipment_ids, intervals, range_start, range_end, granularity, day_start, day_end
+        )
+
+        if date:
+            return ORJSONResponse({"equipment_availability": availability[range_start.isoformat()]})
+
+        return ORJSONResponse({
+            "start_date": range_start.isoformat(),
+            "end_date": range_end.isoformat(),
+            "granularity": granularity,
+            "equipment_availability": availability,
+        })
+
+    except HTTPException:
+        raise
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Dates must be YYYY-MM-DD and times HH:MM.")
+    except Exception as e:
+        await db.rollback()
+        print(f"Error in /equipment/availability: {e}")
+        raise HTTPException(status_code=500, detail="An error occurred.")
+
+
+@router.post("/reserve", dependencies=[Depends(booking_limit)])
+async def reserve_equipment(request: EquipmentReservationRequest, db: AsyncSession = Depends(get_db)):
+    """Reserve one or more items for the same slot; either all are reserved or none."""
+    if request.end_time <= request.start_time:
+        raise HTTPException(status_code=400, detail="end_time must be after start_time.")
+
+    equipment_ids = sorted(set(request.equipment_ids))
+    keys = [(equipment_id, request.reservation_date) for equipment_id in equipment_ids]
+
+    try:
+        await check_reservable(db, equipment_ids)
+        async with lock_equipment_dates(db, keys):
+            reservation_ids = await insert_reservations(db, request, equipment_ids, request.reservation_date)
+            await db.commit()
+
+        await equipment_availability_cache.invalidate(keys)
+        return {"message": "Reservation successful.", "reservation_ids": reservation_ids}
+
+    except HTTPException:
+        await db.rollback()
+        raise
+
+    except Exception as e:
+        print(f"Error reserving equipment: {e}")
+        await db.rollback()
+        raise HTTPException(status_code=500, detail="An error occurred while reserving the equipment.")
+
+
+@router.post("/book-room", dependencies=[Depends(booking_limit)])
+async def book_room_with_equipment(booking: RoomWithEquipment, db: AsyncSession = Depends(get_db)):
+    """
+    Book a room and reserve equipment for the same slot in one transaction:
+    if the room or any item is taken, nothing is booked.
+    """
+    if booking.end_time <= booking.start_time:
+        raise HTTPException(status_code=400, detail="end_time must be after start_time.")
+
+    equipment_ids = sorted(set(booking.equipment_ids))
+    room_keys = [(booking.room_id, booking.booking_date)]
+    equipment_keys = [(equipment_id, booking.booking_date) for equipment_id in equipment_ids]
+
+    try:
+        await check_reservable(db, equipment_ids)
+        # Room locks first, then equipment, the order every writer follows.
+        async with lock_room_dates(db, room_keys), lock_equipment_dates(db, equipment_keys):
+            conflict = await queries.room_conflict(
+                db, booking.room_id, booking.booking_date, booking.start_time, booking.end_time
+            )
+            if conflict is not None:
+                # Same status and body as /api/book-room for the same conflict.
+                raise HTTPException(
+                    status_code=400, detail="The room is already booked for the given date and time."
+                )
+
+            booking_id = await queries.insert_booking(db, **booking.model_dump(exclude={"equipment_ids"}))
+            await record_bookings(db, [
+                (booking.room_id, booking.booking_date, booking.start_time, booking.end_time)
+            ])
+            reservation_ids = await insert_reservations(
+                db, booking, equipment_ids, booking.booking_date, booking_id=booking_id
+            )
+            await bump_versions(db, user_bookings_scope(booking.user_id))
+            await db.commit()
+
+        await availability_cache.invalidate(room_keys)
+        await equipment_availability_cache.invalidate(equipment_keys)
+        await publish_booked([
+            (booking_id, booking.room_id, booking.booking_date, booking.start_time, booking.end_time)
+        ])
+
+        return {"message": "Booking successful.", "booking_id": booking_id, "reservation_ids": reservation_ids}
+
+    except HTTPException:
+        await db.rollback()
+        raise
+
+    except Exception as e:
+        print(f"Error booking room with equipment: {e}")
+        await db.rollback()
+        raise HTTPException(status_code=500, detail="An error occurred while booking the room.")
+
+
+async def set_checkout_state(db: AsyncSession, reservation_id: int, action: Literal["check-out", "check-in"]):
+    """
+    Stamp check-out or check-in with one conditional UPDATE, so two desks
+    handing out the same item cannot both succeed.
+    """
+    if action == "check-out":
+        condition = EquipmentReservation.checked_out_at.is_(None)
+        values = {"checked_out_at": utcnow()}
+    else:
+        condition = EquipmentReservation.checked_out_at.is_not(None) & EquipmentReservation.checked_in_at.is_(None)
+        values = {"checked_in_at": utcnow()}
+
+    result = await db.execute(
+        update(EquipmentReservation)
+        .where(EquipmentReservation.id == reservation_id, condition)
+        .values(**values)
+        .returning(EquipmentReservation)
+    )
+    reservation = result.scalar_one_or_none()
+    if reservation is None:
+        await db.rollback()
+        if await db.get(EquipmentReservation, reservation_id) is None:
+            raise HTTPException(status_code=404, detail="Reservation not found.")
+        detail = "Already checked out." if action == "check-out" else "Not checked out, or already checked in."
+        raise HTTPException(status_code=409, detail=detail)
+    await db.commit()
+    return reservation
+
+
+@router.post("/reservations/{reservation_id}/check-out", response_model=ReservationOut)
+async def check_out(reservation_id: int, db: AsyncSession = Depends(get_db)):
+    return await set_checkout_state(db, reservation_id, "check-out")
+
+
+@router.post("/reservations/{reservation_id}/check-in", response_model=ReservationOut)
+async def check_in(reservation_id: int, db: AsyncSession = Depends(get_db)):
+    return await set_checkout_state(db, reservation_id, "check-in")
+
+
+@router.get("/reservations", response_model=list[ReservationOut])
+async def list_reservations(
+        reservation_date: date,
+        equipment_id: Optional[int] = None,
+        db: AsyncSession = Depends(get_read_db),
+):
+    """Reservations on one date, e.g. for the hand-out desk."""
+    query = (
+        select(EquipmentReservation)
+        .where(EquipmentReservation.reservation_date == reservation_date)
+        .order_by(EquipmentReservation.start_time, EquipmentReservation.id)
+    )
+    if equipment_id is not None:
+        query = query.where(EquipmentReservation.equipment_id == equipment_id)
+    result = await db.execute(query)
+    return result.scalars().all()
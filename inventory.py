@@ -1,39 +1,166 @@
-from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel, Field
+import codecs
+import csv
+import io
+import json
+import orjson
+from typing import Optional
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, Response, UploadFile
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, ConfigDict, Field
 from database.models import Inventory  # Import your Inventory model
-from database.database import get_db
+from database.database import SessionLocal, get_db, get_read_db
+from database.versions import INVENTORY_SCOPE, bump_versions, etag_matches, get_version, make_etag, not_modified
+from auth.ratelimit import cpu_heavy
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy import case, insert, update
 
 router = APIRouter()
 
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+INVENTORY_COLUMNS = (Inventory.id, Inventory.name, Inventory.quantity, Inventory.unit)
+CSV_FIELDS = ("id", "name", "quantity", "unit")
+BULK_CHUNK_SIZE = 500
+MAX_ADJUSTMENTS = 1000
+# Shared by every user; clients revalidate with If-None-Match on each use.
+INVENTORY_CACHE_CONTROL = "no-cache"
+
 class InventoryCreate(BaseModel):
     name: str
     quantity: int
     unit: str
 
+class StockAdjustment(BaseModel):
+    id: int
+    delta: int = Field(..., description="Amount to add (negative to remove)")
+
+class StockAdjustments(BaseModel):
+    adjustments: list[StockAdjustment] = Field(..., min_length=1, max_length=MAX_ADJUSTMENTS)
+
+class InventoryItem(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    name: str
+    quantity: int
+    unit: str
+
 class InventoryUpdate(BaseModel):
     name: str = Field(..., min_length=1, description="Name of the inventory item")
     quantity: int = Field(..., gt=0, description="Quantity of the inventory item")
     unit: str = Field(..., min_length=1, description="Unit of the inventory item")
 
-# Fetch all inventory items
-@router.get("/")
-async def get_inventory(db: AsyncSession = Depends(get_db)):
-    items = await db.execute(select(Inventory))
-    return [item.to_dict() for item in items.scalars().all()]
+def inventory_query(name_prefix: Optional[str], max_quantity: Optional[int]):
+    """Inventory rows (as plain tuples) matching the filters, in id order."""
+    query = select(*INVENTORY_COLUMNS).order_by(Inventory.id)
+    if name_prefix:
+        query = query.where(Inventory.name.startswith(name_prefix, autoescape=True))
+    if max_quantity is not None:
+        query = query.where(Inventory.quantity <= max_quantity)
+    return query
+
+
+async def stream_rows(query):
+    """
+    Yield result rows through a server-side cursor so memory stays flat
+    however many rows there are. The generator owns its session because the
+    request-scoped one is closed before a streaming response starts sending.
+    """
+    async with SessionLocal() as session:
+        result = await session.stream(query.execution_options(yield_per=500))
+        async for row in result:
+            yield row
+
+
+async def stream_inventory(query, ndjson: bool):
+    """Yield the whole result as NDJSON or a JSON array."""
+    first = True
+    if not ndjson:
+        yield b"["
+    async for item_id, name, quantity, unit in stream_rows(query):
+        # Same encoder as ORJSONResponse, so the output matches the paged path.
+        row = orjson.dumps({"id": item_id, "name": name, "quantity": quantity, "unit": unit})
+        if ndjson:
+            yield row + b"\n"
+        else:
+            yield row if first else b"," + row
+        first = False
+    if not ndjson:
+        yield b"]"
+
+
+async def stream_inventory_csv(query):
+    """Yield a header line and then one CSV line per item."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_FIELDS)
+    async for row in stream_rows(query):
+        writer.writerow(row)
+        if buffer.tell() >= 64 * 1024:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+# Fetch inventory items, one keyset page at a time or streamed in full
+@router.get("/", response_model=list[InventoryItem])
+async def get_inventory(
+        request: Request,
+        response: Response,
+        db: AsyncSession = Depends(get_read_db),
+        limit: int = Query(DEFAULT_PAGE_SIZE, gt=0, le=MAX_PAGE_SIZE),
+        after_id: Optional[int] = Query(None, description="Cursor: return items with a larger id"),
+        name_prefix: Optional[str] = Query(None, description="Only items whose name starts with this"),
+        max_quantity: Optional[int] = Query(None, description="Only items with at most this quantity"),
+        stream_all: bool = Query(False, alias="all", description="Stream every matching item instead of one page"),
+        output_format: str = Query("json", alias="format", pattern="^(json|ndjson)$"),
+):
+    # One tag per table version and query string, checked before any rows are read.
+    etag = make_etag(
+        INVENTORY_SCOPE, await get_version(db, INVENTORY_SCOPE), sorted(request.query_params.multi_items())
+    )
+    if etag_matches(request, etag):
+        return not_modified(etag, INVENTORY_CACHE_CONTROL)
+    cache_headers = {"ETag": etag, "Cache-Control": INVENTORY_CACHE_CONTROL}
+
+    query = inventory_query(name_prefix, max_quantity)
+
+    if stream_all:
+        ndjson = output_format == "ndjson"
+        return StreamingResponse(
+            stream_inventory(query, ndjson),
+            media_type="application/x-ndjson" if ndjson else "application/json",
+            headers=cache_headers,
+        )
+
+    if after_id is not None:
+        query = query.where(Inventory.id > after_id)
+    rows = (await db.execute(query.limit(limit + 1))).all()
+    response.headers.update(cache_headers)
+
+    # The extra row only tells us whether another page exists.
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = str(rows[-1].id)
+
+    return [
+        {"id": item_id, "name": name, "quantity": quantity, "unit": unit}
+        for item_id, name, quantity, unit in rows
+    ]
 
 # Add a new inventory item
-@router.post("/", response_model=InventoryCreate)
+@router.post("/", response_model=InventoryItem)
 async def add_inventory_item(item: InventoryCreate, db: AsyncSession = Depends(get_db)):
     new_item = Inventory(name=item.name, quantity=item.quantity, unit=item.unit)
     db.add(new_item)
+    await bump_versions(db, INVENTORY_SCOPE)
     await db.commit()
-    await db.refresh(new_item)
-    return new_item.to_dict()
+    return new_item
 
 # Edit an existing inventory item
-@router.put("/{item_id}", response_model=InventoryUpdate)
+@router.put("/{item_id}", response_model=InventoryItem)
 async def edit_inventory_item(item_id: int, item: InventoryUpdate, db: AsyncSession = Depends(get_db)):
     existing_item = await db.get(Inventory, item_id)
     if not existing_item:
@@ -42,8 +169,9 @@ async def edit_inventory_item(item_id: int, item: InventoryUpdate, db: AsyncSess
     existing_item.name = item.name
     existing_item.quantity = item.quantity
     existing_item.unit = item.unit
+    await bump_versions(db, INVENTORY_SCOPE)
     await db.commit()
-    return existing_item.to_dict()
+    return existing_item
 
 # Delete an inventory item
 @router.delete("/{item_id}")
@@ -53,5 +181,170 @@ async def delete_inventory_item(item_id: int, db: AsyncSession = Depends(get_db)
         raise HTTPException(status_code=404, detail="Item not found")
     
     await db.delete(item)
+    await bump_versions(db, INVENTORY_SCOPE)
     await db.commit()
     return {"detail": "Item deleted"}
+
+
+async def read_lines(upload: UploadFile):
+    """Yield decoded lines (with line endings) from an upload, 64 KiB at a time."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    while chunk := await upload.read(64 * 1024):
+        pending += decoder.decode(chunk)
+        lines = pending.splitlines(keepends=True)
+        # The last piece may be an unfinished line; keep it for the next chunk.
+        pending = lines.pop() if lines and not lines[-1].endswith(("\n", "\r")) else ""
+        for line in lines:
+            yield line
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+async def parse_upload(upload: UploadFile):
+    """
+    Yield (line_number, record) from a CSV file (with a name,quantity,unit
+    header) or from JSON lines, chosen by content type or file extension.
+    """
+    filename = (upload.filename or "").lower()
+    is_csv = filename.endswith(".csv") or (upload.content_type or "").startswith("text/csv")
+
+    line_number = 0
+    if not is_csv:
+        async for line in read_lines(upload):
+            line_number += 1
+            if line.strip():
+                yield line_number, json.loads(line)
+        return
+
+    header = None
+    buffered = []
+    async for line in read_lines(upload):
+        line_number += 1
+        buffered.append(line)
+        # A quoted field may span lines; wait until the record is complete.
+        try:
+            rows = list(csv.reader(buffered, strict=True))
+        except csv.Error:
+            continue
+        buffered = []
+        row = rows[0] if rows else []
+        if not any(value.strip() for value in row):
+            continue
+        if header is None:
+            header = [column.strip().lower() for column in row]
+            continue
+        yield line_number, dict(zip(header, row))
+
+    if buffered:
+        raise HTTPException(status_code=400, detail=f"Line {line_number}: unterminated quoted field.")
+
+
+def validate_record(line_number: int, record: dict):
+    try:
+        name = str(record["name"]).strip()
+        quantity = int(record["quantity"])
+        unit = str(record["unit"]).strip()
+    except (KeyError, TypeError, ValueError):
+        raise HTTPException(
+            status_code=400, detail=f"Line {line_number}: expected name, quantity (integer) and unit."
+        )
+    if not name or not unit or quantity < 0:
+        raise HTTPException(
+            status_code=400, detail=f"Line {line_number}: name and unit are required and quantity must be >= 0."
+        )
+    return {"name": name, "quantity": quantity, "unit": unit}
+
+
+async def upsert_chunk(db: AsyncSession, records: dict):
+    """Update items whose name exists and insert the rest, with one statement each."""
+    existing = await db.execute(
+        select(Inventory.name, Inventory.id).where(Inventory.name.in_(records))
+    )
+    ids = dict(existing.all())
+    updates = [{"id": ids[name], **record} for name, record in records.items() if name in ids]
+    inserts = [record for name, record in records.items() if name not in ids]
+    if updates:
+        await db.execute(update(Inventory), updates)
+    if inserts:
+        await db.execute(insert(Inventory), inserts)
+    return len(inserts), len(updates)
+
+
+# Import many items at once; existing names are updated, new ones inserted
+@router.post("/bulk", dependencies=[Depends(cpu_heavy)])
+async def bulk_upsert_inventory(file: UploadFile = File(...), db: AsyncSession = Depends(get_db)):
+    """
+    Upsert items from a CSV (name,quantity,unit) or JSON-lines upload. The
+    file is parsed as it is read and written in chunks of multi-row
+    statements, all in one transaction: any invalid line rejects the import.
+    """
+    inserted = updated = 0
+    chunk = {}
+    try:
+        async for line_number, record in parse_upload(file):
+            record = validate_record(line_number, record)
+            chunk[record["name"]] = record  # A later line for the same name wins
+            if len(chunk) >= BULK_CHUNK_SIZE:
+                counts = await upsert_chunk(db, chunk)
+                inserted, updated = inserted + counts[0], updated + counts[1]
+                chunk = {}
+        if chunk:
+            counts = await upsert_chunk(db, chunk)
+            inserted, updated = inserted + counts[0], updated + counts[1]
+        await bump_versions(db, INVENTORY_SCOPE)
+        await db.commit()
+    except HTTPException:
+        await db.rollback()
+        raise
+    except (json.JSONDecodeError, UnicodeDecodeError) as e:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail=f"Could not parse upload: {e}")
+
+    return {"detail": "Import complete", "inserted": inserted, "updated": updated}
+
+
+# Export every item as CSV
+@router.get("/export")
+async def export_inventory():
+    return StreamingResponse(
+        stream_inventory_csv(select(*INVENTORY_COLUMNS).order_by(Inventory.id)),
+        media_type="text/csv",
+        headers={"Content-Disposition": 'attachment; filename="inventory.csv"'},
+    )
+
+
+# Apply relative quantity changes to many items atomically
+@router.patch("/adjust", response_model=list[InventoryItem])
+async def adjust_inventory(data: StockAdjustments, db: AsyncSession = Depends(get_db)):
+    """
+    Add each delta to the stored quantity in a single UPDATE
+    (quantity = quantity + delta), so concurrent adjustments never overwrite
+    each other. Rejected as a whole if an item is missing or would go negative.
+    """
+    deltas = {}
+    for adjustment in data.adjustments:
+        deltas[adjustment.id] = deltas.get(adjustment.id, 0) + adjustment.delta
+
+    result = await db.execute(
+        update(Inventory)
+        .where(Inventory.id.in_(deltas))
+        .values(quantity=Inventory.quantity + case(deltas, value=Inventory.id, else_=0))
+        .returning(*INVENTORY_COLUMNS)
+        .execution_options(synchronize_session=False)
+    )
+    rows = result.all()
+
+    missing = set(deltas) - {row.id for row in rows}
+    if missing:
+        await db.rollback()
+        raise HTTPException(status_code=404, detail=f"Items not found: {sorted(missing)}")
+    negative = sorted(row.id for row in rows if row.quantity < 0)
+    if negative:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail=f"Quantity would drop below zero for items: {negative}")
+
+    await bump_versions(db, INVENTORY_SCOPE)
+    await db.commit()
+    return [row._asdict() for row in sorted(rows, key=lambda row: row.id)]
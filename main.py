@@ -1,25 +1,87 @@
-import asyncio
-from fastapi import FastAPI
+import logging
+import time
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from auth.authentication import router as auth_router
 from database.register import router as register_router
 from auth.dashboard import router as dashboard_router
 from booking.booking import router as booking_router
 from inventory import router as inventory_router
-from sqlalchemy.ext.asyncio import AsyncSession
-from database.database import engine, get_db
-from database.models import Base, User, Room
-from passlib.context import CryptContext
-from sqlalchemy.future import select
-import bcrypt
+from equipment.equipment import equipment_availability_cache, router as equipment_router
+from analytics.analytics import router as analytics_router
+from database.database import SessionLocal, env_bool, get_engine, pool_status, replicas, warm_pool
+from database.migrations import check_schema, upgrade
+from database.seed import seed
+from auth.passwords import pending_password_jobs
+from auth.ratelimit import cpu_heavy, login_limit, register_limit, rejection_stats
+from booking.availability_cache import availability_cache
+from booking.events import availability_broker
+from monitoring.metrics import gauge_providers, install_sql_hooks, metrics_middleware
+from monitoring.metrics import router as metrics_router
 
-app = FastAPI()
+logger = logging.getLogger(__name__)
 
-app.include_router(auth_router, prefix="/auth", tags=["Auth"])
-app.include_router(register_router, prefix="/register", tags=["Register"])
+
+async def init_db():
+    """
+    Startup only verifies the schema version. Migrations and seeding are a
+    separate step run once per deploy (python -m database.main upgrade, which
+    serve.py runs before starting the workers) unless AUTO_MIGRATE is set,
+    which is meant for local single-process development.
+
+    The engine is created here, on first call, rather than at import.
+    """
+    started = time.perf_counter()
+    engine = get_engine()
+    install_sql_hooks(engine)
+    for replica in replicas.replicas:
+        install_sql_hooks(replica.engine)
+    if env_bool("AUTO_MIGRATE", False):
+        await upgrade(engine)
+        async with SessionLocal() as session:
+            await seed(session)
+    await check_schema(engine)
+    logger.info("Database ready in %.3fs", time.perf_counter() - started)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await init_db()
+    await warm_pool()
+    replicas.start()
+    yield
+    await availability_broker.close()
+    await replicas.close()
+    await get_engine().dispose()
+
+
+app = FastAPI(default_response_class=ORJSONResponse, lifespan=lifespan)
+
+# bcrypt routes: throttled per client and account, then capped with the other CPU-heavy work.
+app.include_router(
+    auth_router, prefix="/auth", tags=["Auth"], dependencies=[Depends(login_limit), Depends(cpu_heavy)]
+)
+app.include_router(
+    register_router, prefix="/register", tags=["Register"], dependencies=[Depends(register_limit), Depends(cpu_heavy)]
+)
 app.include_router(dashboard_router, prefix="/dashboard", tags=["Dashboard"])
 app.include_router(inventory_router, prefix="/inventory", tags=["Inventory"])
 app.include_router(booking_router, prefix="/api", tags=["Booking"])
+app.include_router(equipment_router, prefix="/api/equipment", tags=["Equipment"])
+app.include_router(analytics_router, prefix="/api/analytics", tags=["Analytics"])
+app.include_router(metrics_router)
+
+app.middleware("http")(metrics_middleware)
+gauge_providers.append(lambda: {f"db_pool_{name}": value for name, value in pool_status().items()})
+gauge_providers.append(replicas.stats)
+gauge_providers.append(lambda: {"password_jobs_pending": pending_password_jobs()})
+gauge_providers.append(cpu_heavy.stats)
+gauge_providers.append(rejection_stats)
+gauge_providers.append(availability_cache.stats)
+gauge_providers.append(equipment_availability_cache.stats)
+gauge_providers.append(lambda: {"availability_stream_subscribers": availability_broker.subscriber_count()})
 
 
 app.add_middleware(
@@ -28,63 +90,13 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
 @app.get("/")
 async def root():
     return {"message": "Welcome to the FastAPI backend"}
 
-async def seed_rooms(db: AsyncSession):
-    # Check if any rooms already exist.
-    existing_rooms_result = await db.execute(select(Room))  # Await query execution
-    existing_rooms = existing_rooms_result.scalars().all()  # Extract scalar ORM results
-
-    # If no existing rooms, add default rooms.
-    if not existing_rooms:
-        rooms = [
-            Room(name="Room A"),
-            Room(name="Room B"),
-            Room(name="Room C"),
-        ]
-        db.add_all(rooms)
-        await db.commit()  # Await commit for async operation
-
-
-async def init_db():
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.drop_all)  # Drops existing schema
-        await conn.run_sync(Base.metadata.create_all)  # Creates updated schema
-    async with AsyncSession(engine) as session:
-        await add_default_users(session)
-        await seed_rooms(session)
-
-
-async def add_default_users(db: AsyncSession):
-    # Hash passwords for admin and user roles
-    password_admin = bcrypt.hashpw("adminpass".encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
-    password_user = bcrypt.hashpw("userpass".encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
-
-    # Check if admin user exists
-    admin_exists = await db.execute(select(User).where(User.username == "admin"))
-    admin_row = admin_exists.scalar_one_or_none()
-
-    # Check if standard user exists
-    user_exists = await db.execute(select(User).where(User.username == "user"))
-    user_row = user_exists.scalar_one_or_none()
-
-    # Add admin user if not exists
-    if not admin_row:
-        admin = User(username="admin", password_hash=password_admin, role="admin")
-        db.add(admin)
-
-    # Add standard user if not exists
-    if not user_row:
-        user = User(username="user", password_hash=password_user, role="user")
-        db.add(user)
-
-    # Commit changes to the database
-    await db.commit()
-
-@app.on_event("startup")
-async def on_startup():
-    await init_db()
\ No newline at end of file
+@app.get("/pool-stats")
+async def get_pool_stats():
+    return pool_status()
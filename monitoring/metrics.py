@@ -0,0 +1,223 @@
+import logging
+import os
+import time
+from contextvars import ContextVar
+from typing import Optional
+from fastapi import APIRouter, Request
+from fastapi.responses import PlainTextResponse
+from sqlalchemy import event
+from starlette.routing import Match
+
+logger = logging.getLogger("performance")
+
+router = APIRouter()
+
+# Requests slower than this are logged together with their SQL breakdown.
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "500"))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus style."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.total += 1
+        self.sum += value
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+
+
+class RequestStats:
+    """SQL activity of one request, collected by the engine event hooks."""
+
+    __slots__ = ("queries", "sql_seconds", "statements")
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.statements = []
+
+    def add(self, statement: str, seconds: float):
+        self.queries += 1
+        self.sql_seconds += seconds
+        self.statements.append((seconds, statement))
+
+
+_current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+request_latency = {}  # (method, route, status) -> Histogram
+request_sql_queries = {}  # (method, route) -> Histogram of statements per request
+in_flight = {}  # route -> requests currently being handled
+sql_totals = {"statements": 0, "seconds": 0.0}
+
+# Extra "name value" gauges registered by other modules (caches, pools, ...).
+gauge_providers = []
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    seconds = time.perf_counter() - conn.info["query_started"].pop()
+    sql_totals["statements"] += 1
+    sql_totals["seconds"] += seconds
+    stats = _current_request.get()
+    if stats is not None:
+        stats.add(statement, seconds)
+
+
+def _handle_error(context):
+    # A failed statement never reaches after_cursor_execute; drop its start
+    # time so it does not stay on the pooled connection.
+    conn = context.connection
+    if conn is not None and conn.info.get("query_started"):
+        conn.info["query_started"].pop()
+
+
+def install_sql_hooks(engine):
+    """Count and time every statement run through the given async engine (once per engine)."""
+    if event.contains(engine.sync_engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine.sync_engine, "handle_error", _handle_error)
+
+
+def _route_label(request: Request) -> str:
+    # Use the route template, not the raw path, to keep label cardinality bounded.
+    for route in request.app.router.routes:
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            return route.path
+    return "unmatched"
+
+
+def _log_slow_request(request: Request, route: str, seconds: float, stats: RequestStats):
+    slowest = sorted(stats.statements, reverse=True)[:5]
+    breakdown = "; ".join(f"{s * 1000:.1f}ms {' '.join(sql.split())[:120]}" for s, sql in slowest)
+    logger.warning(
+        "Slow request %s %s took %.1fms with %d queries (%.1fms SQL): %s",
+        request.method, route, seconds * 1000, stats.queries, stats.sql_seconds * 1000, breakdown,
+    )
+
+
+async def _finish_after(body_iterator, finish):
+    """Pass the response body through and call finish() once it is done or abandoned."""
+    try:
+        async for chunk in body_iterator:
+            yield chunk
+    finally:
+        finish()
+
+
+async def metrics_middleware(request: Request, call_next):
+    """
+    Record latency, in-flight count and SQL usage for every request. call_next
+    returns as soon as the headers are ready, so a request only counts as done
+    when its body has been sent; for streams (SSE, inventory exports) that is
+    when the stream ends.
+    """
+    stats = RequestStats()
+    token = _current_request.set(stats)
+    route = _route_label(request)
+    in_flight[route] = in_flight.get(route, 0) + 1
+    started = time.perf_counter()
+    finished = False
+
+    def finish(status: int, streaming: bool = False):
+        nonlocal finished
+        if finished:
+            return
+        finished = True
+        seconds = time.perf_counter() - started
+        in_flight[route] -= 1
+
+        request_latency.setdefault((request.method, route, status), Histogram()).observe(seconds)
+        request_sql_queries.setdefault(
+            (request.method, route), Histogram(buckets=(0, 1, 2, 5, 10, 25, 50, 100))
+        ).observe(stats.queries)
+
+        # An event stream is meant to stay open; its length is not slowness.
+        if seconds * 1000 >= SLOW_REQUEST_MS and not streaming:
+            _log_slow_request(request, route, seconds, stats)
+
+    try:
+        response = await call_next(request)
+    except BaseException:
+        finish(500)
+        raise
+    finally:
+        _current_request.reset(token)
+
+    streaming = response.headers.get("content-type", "").startswith("text/event-stream")
+    response.body_iterator = _finish_after(
+        response.body_iterator, lambda: finish(response.status_code, streaming)
+    )
+    return response
+
+
+def _labels(**labels) -> str:
+    return ",".join(f'{name}="{value}"' for name, value in labels.items())
+
+
+def _render_histogram(lines, name, histogram, **labels):
+    base = _labels(**labels)
+    for bound, count in zip(histogram.buckets, histogram.counts):
+        lines.append(f'{name}_bucket{{{base},le="{bound}"}} {count}')
+    lines.append(f'{name}_bucket{{{base},le="+Inf"}} {histogram.total}')
+    lines.append(f"{name}_sum{{{base}}} {histogram.sum}")
+    lines.append(f"{name}_count{{{base}}} {histogram.total}")
+
+
+def render_prometheus() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    lines = [
+        "# HELP http_request_duration_seconds Request latency by route.",
+        "# TYPE http_request_duration_seconds histogram",
+    ]
+    for (method, route, status), histogram in sorted(request_latency.items()):
+        _render_histogram(lines, "http_request_duration_seconds", histogram,
+                          method=method, route=route, status=status)
+
+    lines += [
+        "# HELP http_request_sql_statements SQL statements executed per request.",
+        "# TYPE http_request_sql_statements histogram",
+    ]
+    for (method, route), histogram in sorted(request_sql_queries.items()):
+        _render_histogram(lines, "http_request_sql_statements", histogram, method=method, route=route)
+
+    lines += [
+        "# HELP http_requests_in_flight Requests currently being handled.",
+        "# TYPE http_requests_in_flight gauge",
+    ]
+    lines += [
+        f"http_requests_in_flight{{{_labels(route=route)}}} {count}" for route, count in sorted(in_flight.items())
+    ]
+    lines += [
+        "# HELP sql_statements_total SQL statements executed.",
+        "# TYPE sql_statements_total counter",
+        f"sql_statements_total {sql_totals['statements']}",
+        "# HELP sql_statement_seconds_total Time spent executing SQL.",
+        "# TYPE sql_statement_seconds_total counter",
+        f"sql_statement_seconds_total {sql_totals['seconds']}",
+    ]
+
+    for provider in gauge_providers:
+        for name, value in provider().items():
+            lines.append(f"{name} {value}")
+
+    return "\n".join(lines) + "\n"
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def get_metrics():
+    return render_prometheus()
@@ -0,0 +1,92 @@
+"""
+Production entry point:
+
+    python serve.py
+
+Applies pending migrations and seeds the database once, then starts uvicorn
+with several worker processes, so a worker busy with bcrypt or a large
+availability computation does not hold up the requests on the others.
+
+WEB_CONCURRENCY           worker processes (default: one per available CPU core)
+HOST / PORT               bind address (0.0.0.0 / 8000)
+GRACEFUL_TIMEOUT          seconds to let in-flight requests finish on shutdown (20)
+FORWARDED_ALLOW_IPS       proxies trusted for X-Forwarded-* headers (127.0.0.1);
+                          not *, which makes uvicorn take the leftmost
+                          X-Forwarded-For entry, the one the client chooses
+TRUSTED_PROXY_HOPS        proxies appending to X-Forwarded-For in front of the
+                          app, for rate limiting by client address behind a
+                          platform proxy (render.yaml sets 1); see auth/ratelimit.py
+SKIP_MIGRATIONS           start the workers without running the upgrade step
+AVAILABILITY_CACHE_URL    Redis shared by the workers' availability caches;
+                          without it and with more than one worker the cache
+                          is turned off, since a booking would only clear it
+                          on the worker that took it
+AVAILABILITY_BROKER_URL   Redis relaying availability events between workers;
+                          without it an SSE client only hears about bookings
+                          made on its own worker
+
+Every worker opens its own pool, so the database must accept
+WEB_CONCURRENCY * (DB_POOL_SIZE + DB_MAX_OVERFLOW) connections.
+uvloop and httptools are used when installed (they are in requirements.txt
+outside Windows); otherwise uvicorn falls back to asyncio and h11.
+"""
+import asyncio
+import logging
+import os
+
+import uvicorn
+
+logger = logging.getLogger("serve")
+
+
+def worker_count() -> int:
+    if os.getenv("WEB_CONCURRENCY"):
+        return int(os.environ["WEB_CONCURRENCY"])
+    try:
+        return len(os.sched_getaffinity(0))  # Respects container CPU pinning
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def share_worker_state(workers: int):
+    """Keep per-worker state from serving stale availability across workers."""
+    if workers <= 1:
+        return
+    if not os.getenv("AVAILABILITY_CACHE_URL"):
+        # Inherited by the spawned workers; a zero-size cache stores nothing.
+        os.environ["AVAILABILITY_CACHE_SIZE"] = "0"
+        logger.warning(
+            "%d workers and no AVAILABILITY_CACHE_URL: the availability cache is off", workers
+        )
+    if not os.getenv("AVAILABILITY_BROKER_URL"):
+        logger.warning(
+            "%d workers and no AVAILABILITY_BROKER_URL: availability events only reach "
+            "SSE clients on the worker that took the booking", workers
+        )
+
+
+def prepare_database():
+    # Imported here so the parent process only touches the database for this
+    # one step; the workers import the app fresh and build their own engines.
+    from database.main import run
+
+    asyncio.run(run("upgrade"))
+
+
+if __name__ == "__main__":
+    if os.getenv("SKIP_MIGRATIONS", "").lower() not in ("1", "true", "yes", "on"):
+        prepare_database()
+
+    workers = worker_count()
+    share_worker_state(workers)
+    uvicorn.run(
+        "main:app",
+        host=os.getenv("HOST", "0.0.0.0"),
+        port=int(os.getenv("PORT", "8000")),
+        workers=workers,
+        loop="auto",
+        http="auto",
+        proxy_headers=True,
+        forwarded_allow_ips=os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1"),
+        timeout_graceful_shutdown=int(os.getenv("GRACEFUL_TIMEOUT", "20")),
+    )